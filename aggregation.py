@@ -0,0 +1,144 @@
+# Grocery-list aggregation. Every ingredient line of the catalog is compiled once into columnar
+# arrays (recipe, ingredient group, category, canonical magnitude, display unit), so combining
+# a selection of recipes is a gather of their line ranges followed by a single np.add.at
+# reduction per (ingredient, canonical unit) group. Amounts that couldn't be parsed (e.g. "a
+# pinch") form their own group per distinct text and are listed as written. The result is a GroceryList that is already
+# grouped and sorted by category, which the GUI, the command line and the exporters all share.
+import numpy as np # for the columnar line arrays and the grouped reduction
+from quantities import unit_conversion
+from profiling import profiled # for the opt-in per-stage timings
+
+
+class GroceryItem:
+    # One line of the grocery list: the combined amount of an ingredient in its display unit, or
+    # for amounts that couldn't be parsed, an amount of None and the text as written as the unit
+    __slots__ = ('ingredient', 'amount', 'unit', 'category')
+
+    def __init__(self, ingredient, amount, unit, category):
+        self.ingredient = ingredient
+        self.amount = amount
+        self.unit = unit
+        self.category = category
+
+    def as_dict(self):
+        return {'ingredient': self.ingredient, 'amount': self.amount, 'unit': self.unit, 'category': self.category}
+
+
+class GroceryList:
+    # The combined ingredients of some meals, as (category, [GroceryItem, ...]) sections sorted
+    # by category and then by ingredient name
+    __slots__ = ('meals', 'sections')
+
+    def __init__(self, meals, sections):
+        self.meals = meals
+        self.sections = sections
+
+    def items(self):
+        for _, items in self.sections:
+            yield from items
+
+    def as_dict(self):
+        return {'meals': list(self.meals),
+                'categories': [{'category': category, 'items': [item.as_dict() for item in items]} for category, items in self.sections]}
+
+
+class LineColumns:
+    # Columnar copy of every ingredient line in the catalog, in catalog order
+    __slots__ = ('recipe_offsets', 'groups', 'group_ingredients', 'group_opaque', 'categories', 'magnitudes', 'display_units', 'display_factors', 'unit_names')
+
+    @profiled('line_columns')
+    def __init__(self, catalog):
+        unit_table = catalog.unit_table
+        group_ids = {}
+        self.group_ingredients = []
+        # Whether each group holds unparsed amounts, which are counted rather than added up
+        self.group_opaque = []
+        unit_ids = {}
+        self.unit_names = []
+        offsets = [0]
+        groups = []
+        categories = []
+        magnitudes = []
+        display_units = []
+        display_factors = []
+
+        for recipe in catalog.recipes:
+            for line in recipe.lines:
+                conversion = unit_table.get(line.unit)
+                if conversion is None:
+                    conversion = unit_table[line.unit] = unit_conversion(line.unit)
+                canonical_unit, factor, display_unit = conversion
+                magnitude = line.value
+                if magnitude is None:
+                    # Unparsed amounts are grouped by their text, each line counting once
+                    canonical_unit, factor, display_unit, magnitude = None, 1.0, line.value_text, 1.0
+
+                # Lines are summed per (ingredient, canonical unit) group
+                group_key = (line.ingredient_id, canonical_unit, display_unit if canonical_unit is None else None)
+                group_id = group_ids.get(group_key)
+                if group_id is None:
+                    group_id = group_ids[group_key] = len(self.group_ingredients)
+                    self.group_ingredients.append(line.ingredient)
+                    self.group_opaque.append(canonical_unit is None)
+                unit_id = unit_ids.get(display_unit)
+                if unit_id is None:
+                    unit_id = unit_ids[display_unit] = len(self.unit_names)
+                    self.unit_names.append(display_unit)
+
+                groups.append(group_id)
+                categories.append(line.category_id)
+                magnitudes.append(magnitude * factor)
+                display_units.append(unit_id)
+                display_factors.append(factor)
+            offsets.append(len(groups))
+
+        self.recipe_offsets = np.array(offsets, dtype=np.intp)
+        self.groups = np.array(groups, dtype=np.intp)
+        self.categories = np.array(categories, dtype=np.intp)
+        self.magnitudes = np.array(magnitudes, dtype=np.float64)
+        self.display_units = np.array(display_units, dtype=np.intp)
+        self.display_factors = np.array(display_factors, dtype=np.float64)
+
+    def line_rows(self, recipe_indices):
+        # Row numbers of all lines of the given recipes, in catalog order
+        recipe_indices = np.sort(np.asarray(recipe_indices, dtype=np.intp))
+        starts = self.recipe_offsets[recipe_indices]
+        lengths = self.recipe_offsets[recipe_indices + 1] - starts
+        # Concatenated aranges: each line's row is its recipe's start plus its position in the recipe
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(starts, lengths) + positions
+
+
+@profiled('aggregate')
+def aggregate(catalog, columns, meals, recipe_indices):
+    # Combine the lines of the given recipes into a GroceryList. Each ingredient takes the
+    # category and display unit of its first line in catalog order, so the result does not
+    # depend on the order the meals were selected in.
+    rows = columns.line_rows(recipe_indices)
+    unique_groups, first_positions, inverse = np.unique(columns.groups[rows], return_index=True, return_inverse=True)
+
+    # One grouped reduction of the canonical magnitudes
+    totals = np.zeros(len(unique_groups), dtype=np.float64)
+    np.add.at(totals, inverse, columns.magnitudes[rows])
+
+    first_rows = rows[first_positions]
+    amounts = totals / columns.display_factors[first_rows]
+    category_ids = columns.categories[first_rows]
+    unit_ids = columns.display_units[first_rows]
+
+    items = []
+    for group, amount, unit_id, category_id in zip(unique_groups.tolist(), amounts.tolist(), unit_ids.tolist(), category_ids.tolist()):
+        unit = columns.unit_names[unit_id]
+        if columns.group_opaque[group]:
+            # Unparsed amounts are listed as written, with the number of lines using them
+            unit, amount = (unit if amount == 1 else f"{unit} (x{amount:g})"), None
+        items.append(GroceryItem(columns.group_ingredients[group], amount, unit, catalog.category_names[category_id]))
+    items.sort(key=lambda item: (item.category, item.ingredient, item.unit))
+
+    # Group the sorted items into one section per category
+    sections = []
+    for item in items:
+        if not sections or sections[-1][0] != item.category:
+            sections.append((item.category, []))
+        sections[-1][1].append(item)
+    return GroceryList(meals, sections)
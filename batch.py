@@ -0,0 +1,120 @@
+# Batch planning: one JSON request per input line, one JSON result per output line, in the
+# same order. A request either asks for suggestions,
+#   {"id": "smiths", "pantry": ["rice", "onion"], "meals": 3, "require_meat": true}
+# or names the meals itself,
+#   {"id": "joneses", "pantry": "rice,onion", "meals": ["Taqueria Pork Bowls"]}
+# and its result lists the chosen meals, each meal's ingredients missing from the pantry and
+# the combined grocery list. Requests that can't be planned get an "error" instead. The input
+# is read lazily and sent to the workers in chunks, with at most BATCH_WINDOW chunks per worker
+# in flight at a time, so memory stays bounded however long the input is.
+import json # for reading requests and writing results
+from collections import deque # for the in-order window of submitted chunks
+from concurrent.futures import ProcessPoolExecutor # for planning requests in parallel
+from itertools import islice # for cutting the input into chunks
+import recipes2groceries as planner
+
+# Input lines sent to a worker process at a time
+BATCH_CHUNK_SIZE = 32
+
+# Chunks submitted ahead per worker process
+BATCH_WINDOW = 4
+
+
+def request_names(value):
+    # Names given either as a list or as a comma separated string
+    return planner.split_names([value] if isinstance(value, str) else [str(name) for name in value or []])
+
+
+def plan_request(catalog, request):
+    # Plan one request dictionary and return its result dictionary
+    if not isinstance(request, dict):
+        raise ValueError("each line must be a JSON object")
+    pantry = set(request_names(request.get('pantry')))
+    meals = request.get('meals')
+
+    if isinstance(meals, int) and not isinstance(meals, bool):
+        result = planner.suggest_recipes(catalog, pantry, meals, bool(request.get('require_meat')))
+        if result is None:
+            raise ValueError("There aren't that many recipes with the required meats.")
+        chosen = planner.suggested_meals(catalog, result)
+    elif isinstance(meals, (str, list)):
+        chosen = request_names(meals)
+        unknown = [meal for meal in chosen if meal.lstrip('* ') not in catalog.recipes_by_meal]
+        if unknown:
+            raise ValueError(f"unknown meal(s): {', '.join(unknown)}")
+        chosen = [meal.lstrip('* ') for meal in chosen]
+    else:
+        raise ValueError("'meals' must be a number of meals to suggest or a list of meal names")
+
+    missing = []
+    missing_items = set()
+    for meal in chosen:
+        lines = [line for line in catalog.recipes_by_meal[meal].lines if line.ingredient not in pantry]
+        missing.append({'meal': meal, 'missing': [line.ingredient for line in lines]})
+        missing_items.update(line.item_id for line in lines)
+    grocery_list = planner.combine_ingredients(catalog, chosen)
+
+    return {'meals': chosen, 'missing_count': len(missing_items), 'missing': missing,
+            'grocery_list': grocery_list.as_dict()['categories']}
+
+
+def plan_line(catalog, line_number, line):
+    # Plan one input line and return its output line, or None for a blank line
+    if not line.strip():
+        return None
+    request = None
+    try:
+        request = json.loads(line)
+        result = plan_request(catalog, request)
+    except (ValueError, TypeError) as e:
+        result = {'error': str(e)}
+    result['line'] = line_number
+    if isinstance(request, dict) and 'id' in request:
+        result['id'] = request['id']
+    return json.dumps(result)
+
+
+# Catalog of the worker processes, inherited by (or sent once to) each worker through the pool initializer
+_worker_catalog = None
+
+
+def _init_worker(catalog):
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _plan_chunk(numbered_lines):
+    results = (plan_line(_worker_catalog, line_number, line) for line_number, line in numbered_lines)
+    return [result for result in results if result is not None]
+
+
+def iter_results(catalog, lines, workers=1):
+    # Yield the output line of every non-blank input line, in input order
+    numbered = enumerate(lines, 1)
+    if workers <= 1:
+        for line_number, line in numbered:
+            result = plan_line(catalog, line_number, line)
+            if result is not None:
+                yield result
+        return
+
+    from optimizer import pool_context # for the process start method
+    # Compile the search and aggregation structures once, before the workers start, so they
+    # are shared with every worker instead of being rebuilt in each
+    planner.get_incidence(catalog)
+    planner.get_line_columns(catalog)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(), initializer=_init_worker, initargs=(catalog,)) as executor:
+        pending = deque()
+        for chunk in iter(lambda: list(islice(numbered, BATCH_CHUNK_SIZE)), []):
+            pending.append(executor.submit(_plan_chunk, chunk))
+            if len(pending) >= workers * BATCH_WINDOW:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def run_batch(catalog, lines, output, workers=1):
+    # Plan every request in lines and write one result line per request to output
+    for result in iter_results(catalog, lines, workers):
+        output.write(result + '\n')
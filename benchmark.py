@@ -0,0 +1,169 @@
+# Benchmark for the planner on synthetic recipe catalogs. A seeded generator writes a recipes
+# file in the usual {category:ingredient:amount, ...} format (excel, CSV or SQLite), which is
+# then read, parsed, searched and aggregated with profiling enabled; the per-stage wall times
+# and call counts are printed as JSON so runs can be compared across changes:
+#   python benchmark.py --recipes 2000 --ingredients 600 --categories 12 --units oz:4,g:2,x:3
+import argparse # for the benchmark options
+import json # for the report
+import os # for the path of the generated recipes file
+import random # for the seeded catalog generator and the random selections
+import sys # for writing the report
+import tempfile # for a scratch folder holding the generated recipes file
+import profiling # for the per-stage timings
+import recipes2groceries as planner
+from catalog import compile_catalog
+from loaders import iter_recipe_rows
+from quantities import COUNT_UNIT, parse_quantity
+
+# Unit mix used by default, as unit:weight pairs; "x" stands for plain counts such as "2"
+DEFAULT_UNITS = 'oz:4,g:2,tbsp:2,tsp:1,cup:1,clove:1,x:3'
+
+# Amounts drawn for measured and counted ingredients
+MEASURED_AMOUNTS = ('0.25', '0.5', '1', '1.5', '2', '4', '6', '8', '10', '12', '16')
+COUNTED_AMOUNTS = ('1', '2', '3', '4')
+
+
+def parse_unit_mix(text):
+    # "oz:4,g:2,x:3" -> [('oz', 4.0), ('g', 2.0), ('x', 3.0)]; a unit without a weight counts once
+    mix = []
+    for part in text.split(','):
+        unit, _, weight = part.strip().partition(':')
+        mix.append((unit, float(weight) if weight else 1.0))
+    return mix
+
+
+def generate_rows(num_recipes, num_ingredients, num_categories, unit_mix, min_lines=4, max_lines=12, seed=0):
+    # Yield (row index, meal, favourite, ingredients string) rows of a synthetic catalog. Every
+    # ingredient belongs to one category and the first category is "meat", so the Require
+    # Meat rule has something to work with.
+    rng = random.Random(seed)
+    categories = ['meat'] + [f"category {i}" for i in range(1, num_categories)]
+    ingredients = [(rng.choice(categories), f"ingredient {i}") for i in range(num_ingredients)]
+    units = [unit for unit, _ in unit_mix]
+    weights = [weight for _, weight in unit_mix]
+    for row_index in range(num_recipes):
+        parts = []
+        for category, ingredient in rng.sample(ingredients, min(rng.randint(min_lines, max_lines), num_ingredients)):
+            unit = rng.choices(units, weights)[0]
+            if unit == COUNT_UNIT:
+                amount = rng.choice(COUNTED_AMOUNTS)
+            else:
+                amount = f"{rng.choice(MEASURED_AMOUNTS)} {unit}"
+            parts.append(f"{category}:{ingredient}:{amount}")
+        favourite = 1 if rng.random() < 0.1 else None
+        yield row_index, f"Meal {row_index}", favourite, '{' + ', '.join(parts) + '}'
+
+
+def write_recipes(path, rows):
+    # Write generated rows to an excel, CSV or SQLite recipes file, chosen by extension
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        import csv # for writing CSV files
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(('Favourite', 'Meal', 'Ingredients'))
+            writer.writerows((favourite, meal, ingredients) for _, meal, favourite, ingredients in rows)
+    elif extension in ('.db', '.sqlite', '.sqlite3'):
+        import sqlite3 # for writing SQLite databases
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute("CREATE TABLE recipes (Favourite INTEGER, Meal TEXT, Ingredients TEXT)")
+            connection.executemany("INSERT INTO recipes VALUES (?, ?, ?)", ((favourite, meal, ingredients) for _, meal, favourite, ingredients in rows))
+        connection.close()
+    else:
+        from openpyxl import Workbook # for writing excel files
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(('Favourite', 'Meal', 'Ingredients'))
+        for _, meal, favourite, ingredients in rows:
+            worksheet.append((favourite, meal, ingredients))
+        workbook.save(path)
+
+
+def time_rendering(catalog, path):
+    # Build the GUI for the catalog without showing it; returns None, or why it was skipped
+    try:
+        import tkinter as tk # for the GUI
+        from gui import RecipesApp # for the main window
+        root = tk.Tk()
+    except Exception as e:
+        # ImportError without tkinter, or tkinter.TclError when there is no display
+        return str(e)
+    root.withdraw()
+    with profiling.stage('gui'):
+        app = RecipesApp(root, catalog, path)
+        root.update_idletasks()
+    app.job_runner.shutdown()
+    app.reload_runner.shutdown()
+    root.destroy()
+    return None
+
+
+def run_benchmark(args):
+    # Generate a catalog, run every stage on it and return the report dictionary
+    profiling.enable()
+    profiling.reset()
+    rng = random.Random(args.seed)
+    report = {'config': vars(args)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'recipes.' + args.format)
+        write_recipes(path, generate_rows(args.recipes, args.ingredients, args.categories, parse_unit_mix(args.units),
+                                          args.min_lines, args.max_lines, args.seed))
+        report['file_bytes'] = os.path.getsize(path)
+
+        # Reading the file and parsing the rows are timed separately
+        with profiling.stage('read'):
+            rows = list(iter_recipe_rows(path))
+        # Start from an empty pint cache so the unit conversions are paid for in full
+        parse_quantity.cache_clear()
+        catalog = compile_catalog(rows)
+        del rows
+        report['catalog'] = {'recipes': len(catalog.recipes), 'lines': sum(len(recipe.lines) for recipe in catalog.recipes),
+                             'ingredients': len(catalog.ingredient_names), 'units': len(catalog.unit_table)}
+
+        # Suggestion searches from random pantries and grocery lists of random meal selections,
+        # with the result caches emptied so every call does the work
+        ingredients = catalog.ingredient_names
+        for _ in range(args.searches):
+            planner.clear_result_caches()
+            pantry = rng.sample(ingredients, min(args.pantry, len(ingredients)))
+            planner.suggest_recipes(catalog, pantry, args.meals, workers=args.workers)
+        for _ in range(args.combines):
+            planner.clear_result_caches()
+            planner.combine_ingredients(catalog, rng.sample(catalog.sorted_meals, min(args.meals, len(catalog.sorted_meals))))
+
+        if args.tk:
+            skipped = time_rendering(catalog, path)
+            if skipped is not None:
+                report['gui_skipped'] = skipped
+
+    report['stages'] = profiling.report()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the planner on a synthetic recipe catalog.")
+    parser.add_argument('--recipes', type=int, default=500, help="number of recipes (default: %(default)s)")
+    parser.add_argument('--ingredients', type=int, default=300, help="number of distinct ingredients (default: %(default)s)")
+    parser.add_argument('--categories', type=int, default=10, help="number of ingredient categories (default: %(default)s)")
+    parser.add_argument('--units', default=DEFAULT_UNITS, help="unit mix as unit:weight pairs, x for plain counts (default: %(default)s)")
+    parser.add_argument('--min-lines', type=int, default=4, help="fewest ingredients per recipe (default: %(default)s)")
+    parser.add_argument('--max-lines', type=int, default=12, help="most ingredients per recipe (default: %(default)s)")
+    parser.add_argument('--format', choices=('xlsx', 'csv', 'db'), default='xlsx', help="recipes file format (default: %(default)s)")
+    parser.add_argument('--meals', type=int, default=3, help="meals per suggestion and grocery list (default: %(default)s)")
+    parser.add_argument('--pantry', type=int, default=10, help="ingredients in each random pantry (default: %(default)s)")
+    parser.add_argument('--searches', type=int, default=5, help="suggestion searches to run (default: %(default)s)")
+    parser.add_argument('--combines', type=int, default=50, help="grocery lists to combine (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes per search (default: %(default)s)")
+    parser.add_argument('--tk', action='store_true', help="also time building the GUI (needs a display)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the generator and the selections (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    json.dump(run_benchmark(args), sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
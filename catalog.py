@@ -0,0 +1,258 @@
+# Import packages
+import hashlib # for hashing each row's ingredients, so unchanged rows can be reused on reload
+import re   # for regular expression operations, used to split amounts from their units
+import sys  # for sys.intern, so repeated ingredient and category names share one string object
+import uuid # for a fresh version id for every compiled catalog
+from fractions import Fraction # for exact fractions such as "1 1/2"
+from quantities import build_unit_table # for the precomputed unit conversion table
+from profiling import profiled # for the opt-in per-stage timings
+
+# Pattern used to pull the unit (the first run of letters) out of an amount such as "10oz" or "2 tbsp"
+UNIT_PATTERN = re.compile(r'([a-zA-Z]+)')
+
+# Numbers accepted as amounts: decimals, fractions and mixed numbers such as "1 1/2"
+NUMBER_PATTERN = re.compile(r'(?:(?P<whole>\d+)\s+)?(?P<numerator>\d+)/(?P<denominator>\d+)|(?P<decimal>\d+(?:\.\d*)?|\.\d+)')
+
+
+class IngredientLine:
+    # One parsed "category:ingredient:amount" entry of a recipe
+    __slots__ = ('category', 'ingredient', 'category_id', 'ingredient_id', 'item_id',
+                 'amount_text', 'value_text', 'value', 'unit')
+
+    def __init__(self, category, ingredient, category_id, ingredient_id, item_id, amount_text, value_text, value, unit):
+        self.category = category
+        self.ingredient = ingredient
+        self.category_id = category_id
+        self.ingredient_id = ingredient_id
+        self.item_id = item_id
+        self.amount_text = amount_text
+        self.value_text = value_text
+        # None when the amount couldn't be parsed; value_text then holds the amount as written
+        self.value = value
+        self.unit = unit
+
+    @property
+    def formatted(self):
+        # Text shown for the ingredient in the suggestion output, using "x" for count only;
+        # amounts that couldn't be parsed are shown as written
+        if self.value is None:
+            return f"{self.value_text} {self.ingredient}"
+        return f"{self.value_text} {self.unit or 'x'} {self.ingredient}"
+
+
+class Recipe:
+    # One meal of the catalog together with its parsed ingredient lines
+    __slots__ = ('meal', 'favourite', 'row_index', 'lines', 'index', 'row_hash')
+
+    def __init__(self, meal, favourite, row_index, lines, row_hash=None):
+        self.meal = meal
+        self.favourite = favourite
+        self.row_index = row_index
+        self.lines = lines
+        # Hash of the row's ingredients string; None if the row had format issues
+        self.row_hash = row_hash
+        # Position of the recipe in the catalog's sorted recipe list
+        self.index = None
+
+    @property
+    def display_name(self):
+        # Favourites are marked with a leading '*' in the meal list
+        return f"* {self.meal}" if self.favourite else self.meal
+
+
+class Catalog:
+    # The compiled recipe catalog: every recipe parsed once, with interned ids and a meal index
+    __slots__ = ('recipes', 'recipes_by_meal', 'sorted_meals',
+                 'category_names', 'category_ids', 'ingredient_names', 'ingredient_ids',
+                 'item_keys', 'item_ids', 'unique_ingredients', 'ingredient_counts', 'format_issues', 'unit_table', 'incidence', 'line_columns', 'pantry_state', 'version')
+
+    def __init__(self):
+        self.recipes = []
+        self.recipes_by_meal = {}
+        self.sorted_meals = []
+        # Interned ids: category name -> id, ingredient name -> id, (category id, ingredient id) -> item id
+        self.category_names = []
+        self.category_ids = {}
+        self.ingredient_names = []
+        self.ingredient_ids = {}
+        self.item_keys = []
+        self.item_ids = {}
+        self.unique_ingredients = {}
+        self.ingredient_counts = {}
+        self.format_issues = []
+        # Unit as written in the recipes -> (canonical unit, conversion factor, display name)
+        self.unit_table = {}
+        # Packed incidence matrix used by the suggestion search, built on first use
+        self.incidence = None
+        # Columnar ingredient lines used by the grocery-list aggregation, built on first use
+        self.line_columns = None
+        # Incrementally updated scoring state of the last pantry selection searched
+        self.pantry_state = None
+        # Identifies this compilation of the recipes in result caches; catalogs loaded through
+        # the catalog cache use the workbook's content hash instead
+        self.version = uuid.uuid4().hex
+
+    def intern_category(self, category):
+        category_id = self.category_ids.get(category)
+        if category_id is None:
+            category_id = len(self.category_names)
+            self.category_ids[category] = category_id
+            self.category_names.append(sys.intern(category))
+        return category_id
+
+    def intern_ingredient(self, ingredient):
+        ingredient_id = self.ingredient_ids.get(ingredient)
+        if ingredient_id is None:
+            ingredient_id = len(self.ingredient_names)
+            self.ingredient_ids[ingredient] = ingredient_id
+            self.ingredient_names.append(sys.intern(ingredient))
+        return ingredient_id
+
+    def intern_item(self, category_id, ingredient_id):
+        key = (category_id, ingredient_id)
+        item_id = self.item_ids.get(key)
+        if item_id is None:
+            item_id = len(self.item_keys)
+            self.item_ids[key] = item_id
+            self.item_keys.append(key)
+        return item_id
+
+
+def parse_value(amount_value):
+    # Float value of an amount's number: a decimal ("2", "2.5", ".5"), a fraction ("1/2") or a
+    # mixed number ("1 1/2"). Anything else (e.g. "2-3" or "1,5") raises ValueError rather than
+    # being guessed at, so the amount is listed as written.
+    match = NUMBER_PATTERN.fullmatch(amount_value)
+    if match is None:
+        raise ValueError(f"could not parse '{amount_value}' as a number")
+    if match.group('decimal') is not None:
+        return float(match.group('decimal'))
+    if int(match.group('denominator')) == 0:
+        raise ValueError(f"could not parse '{amount_value}' as a number")
+    value = Fraction(int(match.group('numerator')), int(match.group('denominator')))
+    if match.group('whole') is not None:
+        value += int(match.group('whole'))
+    return float(value)
+
+
+def parse_amount(amount_with_unit):
+    # Split an amount such as "10oz", "2.5 oz", "1 1/2 lb" or "1" into its value text, float value
+    # and unit; raises ValueError for amounts that aren't a number and a unit, e.g. "a pinch"
+    match = UNIT_PATTERN.search(amount_with_unit)
+    if match:
+        amount_unit = match.group(1)
+        amount_value = amount_with_unit.replace(amount_unit, '').strip()
+    else:
+        # If no unit is found, the amount is a plain count
+        amount_unit = None
+        amount_value = amount_with_unit.strip()
+    if not amount_value:
+        amount_value = '1'
+    return amount_value, parse_value(amount_value), amount_unit
+
+
+@profiled('parse')
+def parse_ingredients(catalog, ingredients, row_index):
+    # Parse one recipe's "{category:ingredient:amount, ...}" string into interned ingredient lines
+    lines = []
+    for ingredient_with_category in ingredients.strip("{}").split(', '):
+        parts = ingredient_with_category.split(':')
+
+        # Check if the ingredient format is valid
+        if len(parts) == 3:
+            category, ingredient, amount_with_unit = parts
+        elif len(parts) == 2:
+            # Log issues with ingredient amount format
+            catalog.format_issues.append(f"Error parsing ingredient amount in row {row_index}: {parts[1]}")
+            continue
+        else:
+            # Log issues with ingredient format
+            catalog.format_issues.append(f"Error parsing ingredient amount in row {row_index}: {ingredient_with_category}")
+            continue
+
+        try:
+            value_text, value, unit = parse_amount(amount_with_unit)
+        except ValueError as e:
+            # Record amounts that are not numbers, e.g. "a pinch", but keep the ingredient: its
+            # amount is listed as written instead of being added up
+            catalog.format_issues.append(f"Error processing amount '{amount_with_unit}' in row {row_index}, ingredient '{ingredient}': {e}")
+            value_text, value, unit = amount_with_unit.strip(), None, None
+
+        category_id = catalog.intern_category(category)
+        ingredient_id = catalog.intern_ingredient(ingredient)
+        item_id = catalog.intern_item(category_id, ingredient_id)
+        lines.append(IngredientLine(catalog.category_names[category_id], catalog.ingredient_names[ingredient_id],
+                                    category_id, ingredient_id, item_id, amount_with_unit, value_text, value, unit))
+    return tuple(lines)
+
+
+def reintern_lines(catalog, lines):
+    # Intern the names of ingredient lines parsed for another catalog into this one, so only the
+    # categories, ingredients and items still in use get ids; lines whose ids come out the same
+    # are shared rather than copied
+    reinterned = []
+    for line in lines:
+        category_id = catalog.intern_category(line.category)
+        ingredient_id = catalog.intern_ingredient(line.ingredient)
+        item_id = catalog.intern_item(category_id, ingredient_id)
+        if (category_id, ingredient_id, item_id) != (line.category_id, line.ingredient_id, line.item_id):
+            line = IngredientLine(line.category, line.ingredient, category_id, ingredient_id, item_id,
+                                  line.amount_text, line.value_text, line.value, line.unit)
+        reinterned.append(line)
+    return tuple(reinterned)
+
+
+def row_hash(ingredients):
+    return hashlib.blake2b(ingredients.encode(), digest_size=16).digest()
+
+
+@profiled('compile')
+def compile_catalog(rows, previous=None):
+    # Build a catalog from (row index, meal, favourite, ingredients string) tuples in file order.
+    # When recompiling a changed file, previous is the catalog compiled from the old version:
+    # rows whose ingredients hash the same as one of its recipes reuse that recipe's parsed
+    # lines, so only added and changed rows are parsed again. Ids are assigned afresh, so names
+    # deleted from the file don't linger in the new catalog.
+    catalog = Catalog()
+    reusable_lines = {}
+    if previous is not None:
+        reusable_lines = {recipe.row_hash: recipe.lines for recipe in previous.recipes if recipe.row_hash is not None}
+
+    for row_index, meal, favourite, ingredients in rows:
+        ingredients_hash = row_hash(ingredients)
+        lines = reusable_lines.get(ingredients_hash)
+        if lines is not None:
+            lines = reintern_lines(catalog, lines)
+        else:
+            issue_count = len(catalog.format_issues)
+            lines = parse_ingredients(catalog, ingredients, row_index)
+            if len(catalog.format_issues) > issue_count:
+                # Rows with format issues are always parsed again so their messages are reported
+                ingredients_hash = None
+        catalog.recipes.append(Recipe(str(meal), favourite == 1, row_index, lines, ingredients_hash))
+
+        for line in lines:
+            # Add the ingredient to the appropriate category set and update its count
+            catalog.unique_ingredients.setdefault(line.category, set()).add(line.ingredient)
+            catalog.ingredient_counts[line.ingredient] = catalog.ingredient_counts.get(line.ingredient, 0) + 1
+
+    # Sort the unique ingredients in each category
+    for category in catalog.unique_ingredients:
+        catalog.unique_ingredients[category] = sorted(catalog.unique_ingredients[category])
+
+    # Sort the recipes by meal name so meals are listed in alphabetical order
+    catalog.recipes.sort(key=lambda recipe: recipe.meal)
+    catalog.sorted_meals = [recipe.meal for recipe in catalog.recipes]
+    catalog.unit_table = build_unit_table(catalog.recipes, previous.unit_table if previous is not None else None)
+    for index, recipe in enumerate(catalog.recipes):
+        recipe.index = index
+        catalog.recipes_by_meal.setdefault(recipe.meal, recipe)
+    return catalog
+
+
+@profiled('load_catalog')
+def load_catalog(path, previous=None):
+    # Stream the recipe rows of an excel, CSV or SQLite file straight into the catalog, so peak
+    # memory scales with the compiled catalog rather than with a full copy of the source
+    from loaders import iter_recipe_rows # for the streaming reader matching the file type
+    return compile_catalog(iter_recipe_rows(path), previous)
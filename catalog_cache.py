@@ -0,0 +1,78 @@
+# On-disk cache of the compiled recipe catalog. The cache file sits next to the workbook and
+# is keyed by the workbook's size, modification time and content hash, so warm starts skip
+# reading and parsing the Excel file entirely. Bump CACHE_VERSION whenever the catalog
+# classes change shape so old cache files are ignored instead of unpickled into stale objects.
+import hashlib # for hashing the workbook contents
+import os # for stat calls and atomic replacement of the cache file
+import pickle # for the compact binary cache format
+from catalog import load_catalog
+from profiling import profiled # for the opt-in per-stage timings
+
+CACHE_VERSION = 8
+CACHE_SUFFIX = '.cache'
+
+
+def cache_path(path):
+    # Cache file stored alongside the workbook, e.g. recipes.xlsx -> recipes.xlsx.cache
+    return path + CACHE_SUFFIX
+
+
+def file_hash(path):
+    # SHA-256 of the file contents, read in blocks
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_cache(path):
+    # Return the cache entry dictionary, or None if there is no usable cache file
+    try:
+        with open(cache_path(path), 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+        return None
+    return entry
+
+
+def write_cache(path, entry):
+    # Write the cache atomically; a read-only folder just means running without a cache
+    target = cache_path(path)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+@profiled('load')
+def load_cached_catalog(path, loader=load_catalog):
+    # Load the compiled catalog from the cache if the workbook is unchanged, otherwise
+    # compile it with loader(path) and refresh the cache
+    stat = os.stat(path)
+    entry = read_cache(path)
+
+    # Same size and modification time: trust the cache without reading the workbook at all
+    if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['catalog']
+
+    # The file was touched or copied: reuse the cache if the contents are still the same
+    content_hash = file_hash(path)
+    if entry is not None and entry['sha256'] == content_hash:
+        entry['size'], entry['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        write_cache(path, entry)
+        return entry['catalog']
+
+    catalog = loader(path)
+    catalog.version = content_hash
+    write_cache(path, {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'sha256': content_hash, 'catalog': catalog})
+    return catalog
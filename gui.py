@@ -0,0 +1,596 @@
+# Tkinter interface for recipes2groceries. This module is only imported when the GUI is
+# opened, so the planner can be used from scripts and the command line without tkinter.
+import difflib # for patching listboxes with only the rows that changed
+from collections import deque # for the queue of ingredient categories still to be built
+import tkinter as tk # for creating graphical user interface (GUI) components
+from tkinter import ttk
+import recipes2groceries as planner # for loading recipes, suggesting meals and combining ingredients
+from jobs import JobRunner # for running searches and calculations off the Tk main thread
+from profiling import profiled # for timing the widget rendering when profiling is enabled
+from search_index import SearchIndex # for the meal and ingredient filter boxes
+from watcher import FileWatcher # for noticing when the recipes file has been saved
+
+### Number of worker processes for the recipe suggestion search (1 searches in the GUI process;
+### raise it to spread large catalogs across CPU cores). The workers are started afresh for every
+### search and share the candidate matrix through shared memory, so this only pays off for
+### searches that take well over the second or so the workers need to start.
+SEARCH_WORKERS = 1
+
+### Number of ranked alternative plans kept by a suggestion search, paged with Previous/Next
+SUGGESTION_ALTERNATIVES = 5
+
+# Milliseconds between checks on a running background job
+POLL_INTERVAL_MS = 100
+
+### Number of ingredient categories whose widgets are built at a time: the first batch when the
+### window opens, the rest in further batches whenever Tk is idle, so opening the window takes
+### the same time however many categories the catalog has
+CATEGORY_BATCH_SIZE = 10
+
+# Milliseconds between checks for changes to the recipes file
+WATCH_INTERVAL_MS = 1000
+
+
+def describe_search_progress(covered, total, best_count):
+    # Text shown while the suggestion search is running
+    text = f"Searching: {covered:,} of {total:,} candidates evaluated"
+    if best_count != float('inf'):
+        text += f", best so far: {best_count} missing"
+    return text + "\n"
+
+
+def combine_job(catalog, selected_recipes, progress=None, cancel=None):
+    # Background job adding up the selected recipes' ingredients; it is a single grouped
+    # reduction, so it reports no progress and runs to completion once started
+    return planner.combine_ingredients(catalog, selected_recipes)
+
+
+def reload_catalog(catalog, path, progress=None, cancel=None):
+    # Background job reloading a changed recipes file against the current catalog
+    return planner.reload_recipes(catalog, path)
+
+
+def patch_listbox(listbox, items, key, selected=None):
+    # Make a listbox show items by deleting and inserting only the rows that changed, so the
+    # unchanged rows keep their place; rows are reselected if key(row text) is in selected
+    # (by default, the keys of the rows selected before)
+    if selected is None:
+        selected = {key(listbox.get(i)) for i in listbox.curselection()}
+    old_items = listbox.get(0, tk.END)
+    matcher = difflib.SequenceMatcher(None, old_items, items, autojunk=False)
+    # Apply the edits back to front so the positions of earlier edits stay valid
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == 'equal':
+            continue
+        if i2 > i1:
+            listbox.delete(i1, i2 - 1)
+        if j2 > j1:
+            listbox.insert(i1, *items[j1:j2])
+    select_rows(listbox, items, key, selected)
+
+
+def fill_listbox(listbox, items, key, selected):
+    # Replace the rows of a listbox with items in two calls and reselect the rows whose key is in selected
+    listbox.delete(0, tk.END)
+    listbox.insert(tk.END, *items)
+    select_rows(listbox, items, key, selected)
+
+
+def select_rows(listbox, items, key, selected):
+    # Reselect runs of consecutive rows with one call each
+    run_start = None
+    for i, item in enumerate(items + [None]):
+        if item is not None and key(item) in selected:
+            if run_start is None:
+                run_start = i
+        elif run_start is not None:
+            listbox.selection_set(run_start, i - 1)
+            run_start = None
+
+
+def remember_selection(listbox, key, selected):
+    # Update a selection set from a filtered listbox: the rows shown now replace what was
+    # remembered for them, while rows hidden by the filter keep their remembered state
+    selected.difference_update(key(row) for row in listbox.get(0, tk.END))
+    selected.update(key(listbox.get(i)) for i in listbox.curselection())
+
+
+def filter_matches(index, filter_var):
+    # Names matching a filter box, or None when the box is empty
+    query = filter_var.get()
+    return index.search(query) if query.strip() else None
+
+
+def catalog_ingredients(catalog):
+    return {ingredient for ingredients in catalog.unique_ingredients.values() for ingredient in ingredients}
+
+
+def meal_key(display_name):
+    # Meal name of a meal listbox row, without the favourite marker
+    return display_name.lstrip('* ')
+
+
+def ingredient_key(display_text):
+    # Ingredient name of an ingredient listbox row, without its recipe count
+    return display_text.split('\t')[-1].strip()
+
+
+class RecipesApp:
+    # The main window: meals on the left, ingredients in the middle, output and controls on the right.
+    # The recipes file at path is watched and reloaded in place whenever it is saved.
+    def __init__(self, root, catalog, path=planner.RECIPES_PATH):
+        self.root = root
+        self.catalog = catalog
+        self.path = path
+
+        # Initialize an empty list to store suggested recipes
+        self.suggested_recipes = []
+
+        # The last suggestion search result, the rank of the plan on display and the pantry it was scored against
+        self.suggestion = None
+        self.suggestion_rank = 0
+        self.suggestion_ingredients = set()
+
+        # Progress text of the running background job last shown in the output
+        self.progress_text = None
+
+        # Selections are kept here rather than read from the listboxes, so that they survive
+        # filtering: meal names, and ingredient names per category
+        self.selected_meals = set()
+        self.selected_ingredients = {}
+
+        # Indexes searched by the filter boxes above the meal and ingredient lists
+        self.meal_index = SearchIndex(catalog.sorted_meals)
+        self.ingredient_index = SearchIndex(catalog_ingredients(catalog))
+        self.build_row_tables()
+
+        # Runner for the background jobs started by the buttons
+        self.job_runner = JobRunner()
+
+        # Separate runner for reloading the recipes file, so a reload never cancels a search
+        self.reload_runner = JobRunner()
+        self.reload_job = None
+        self.watcher = FileWatcher(path)
+
+        root.title("Meal Ingredients Calculator")  # Set the title of the window
+        root.geometry("1000x700")  # Set the dimensions of the window
+
+        self.build_meals_column()
+        self.build_ingredients_column()
+        self.build_output_column()
+
+        # Start watching the recipes file for changes
+        self.root.after(WATCH_INTERVAL_MS, self.check_for_changes)
+
+    @profiled('render')
+    def build_meals_column(self):
+        # Create a frame to hold the list of meals
+        meals_frame = tk.Frame(self.root)
+        meals_frame.pack(side='left', fill='both', expand=True)
+
+        # Create and place a label for the meals section
+        meals_title_label = tk.Label(meals_frame, text="Select Meals", font=("Helvetica", 14, "bold"))
+        meals_title_label.pack(side='top', padx=10, pady=5)
+
+        # Filter box: typing narrows the list to the meals containing the text
+        self.meal_filter_var = tk.StringVar()
+        meal_filter_entry = tk.Entry(meals_frame, textvariable=self.meal_filter_var)
+        meal_filter_entry.pack(side='top', fill='x', padx=10, pady=2)
+        self.meal_filter_var.trace_add('write', lambda *args: self.filter_meals())
+
+        # Create and place a vertical scrollbar for the meal listbox
+        meal_scrollbar = tk.Scrollbar(meals_frame, orient='vertical')
+        meal_scrollbar.pack(side='right', fill='y')
+
+        # Create a listbox to display the meals, allowing multiple selections; exportselection is
+        # off so selecting text in the filter box doesn't clear the selected meals
+        self.meal_listbox = tk.Listbox(meals_frame, yscrollcommand=meal_scrollbar.set, selectmode='multiple', exportselection=False, width=35)
+        # Populate the listbox with meals and mark favourites with a leading '*', in a single
+        # insert call; the listbox only draws the rows that are scrolled into view
+        self.shown_meal_rows = self.meal_rows()
+        self.meal_listbox.insert(tk.END, *self.shown_meal_rows)
+        self.meal_listbox.bind('<<ListboxSelect>>', lambda event: remember_selection(self.meal_listbox, meal_key, self.selected_meals))
+        # Pack the listbox and configure scrolling
+        self.meal_listbox.pack(side='left', fill='both', expand=True)
+        self.meal_listbox.config(yscrollcommand=meal_scrollbar.set)
+        meal_scrollbar.config(command=self.meal_listbox.yview)
+
+    def build_row_tables(self):
+        # Listbox rows of every meal and ingredient of the catalog, with their positions in the
+        # unfiltered lists, so filtering only looks at the names the search index matched
+        self.all_meal_rows = [recipe.display_name for recipe in self.catalog.recipes]
+        self.meal_row_table = {}
+        for position, recipe in enumerate(self.catalog.recipes):
+            self.meal_row_table.setdefault(recipe.meal, []).append((position, recipe.display_name))
+        self.all_ingredient_rows = {}
+        self.ingredient_row_table = {}
+        for category, ingredients in self.catalog.unique_ingredients.items():
+            rows = self.all_ingredient_rows[category] = [f"{self.catalog.ingredient_counts[ingredient]}\t{ingredient}" for ingredient in ingredients]
+            for position, (ingredient, row) in enumerate(zip(ingredients, rows)):
+                self.ingredient_row_table.setdefault(ingredient, []).append((category, position, row))
+
+    def meal_rows(self, matches=None):
+        # Meal listbox rows, limited to the meal names in matches unless it is None
+        if matches is None:
+            return self.all_meal_rows
+        return [row for _, row in sorted(entry for meal in matches for entry in self.meal_row_table[meal])]
+
+    @profiled('render')
+    def filter_meals(self):
+        # Show only the meals matching the filter box, keeping hidden meals selected; the
+        # listbox is left alone when the matching rows haven't changed
+        rows = self.meal_rows(filter_matches(self.meal_index, self.meal_filter_var))
+        if rows != self.shown_meal_rows:
+            fill_listbox(self.meal_listbox, rows, meal_key, self.selected_meals)
+            self.shown_meal_rows = rows
+
+    def selected_meal_names(self):
+        # Selected meals in list order, including any hidden by the filter
+        return list(dict.fromkeys(recipe.meal for recipe in self.catalog.recipes if recipe.meal in self.selected_meals))
+
+    @profiled('render')
+    def build_ingredients_column(self):
+        # Create a frame to hold the ingredients
+        ingredients_frame = tk.Frame(self.root)
+        ingredients_frame.pack(side='left', fill='both', expand=True)
+
+        # Create and place a label for the ingredients section
+        ingredients_title_label = tk.Label(ingredients_frame, text="Select Ingredients", font=("Helvetica", 14, "bold"))
+        ingredients_title_label.pack(side='top', padx=10, pady=5)
+
+        # Filter box: typing narrows every category to the ingredients containing the text
+        self.ingredient_filter_var = tk.StringVar()
+        ingredient_filter_entry = tk.Entry(ingredients_frame, textvariable=self.ingredient_filter_var)
+        ingredient_filter_entry.pack(side='top', fill='x', padx=10, pady=2)
+        self.ingredient_filter_var.trace_add('write', lambda *args: self.filter_ingredients())
+
+        # Create a frame to hold the canvas and scrollbar together
+        scrollable_frame = tk.Frame(ingredients_frame)
+        scrollable_frame.pack(side='left', fill='both', expand=True)
+
+        # Create a canvas to hold the ingredient categories
+        self.canvas = tk.Canvas(scrollable_frame)
+        self.canvas.pack(side='left', fill='both', expand=True)
+
+        # Add a scrollbar linked to the canvas
+        overall_ingredient_scrollbar = tk.Scrollbar(scrollable_frame, orient='vertical', command=self.canvas.yview)
+        overall_ingredient_scrollbar.pack(side='right', fill='y')
+
+        # Configure canvas to use scrollbar
+        self.canvas.config(yscrollcommand=overall_ingredient_scrollbar.set)
+
+        # Create a frame inside the canvas to hold the ingredient category frames
+        self.ingredient_category_container = tk.Frame(self.canvas)
+        self.canvas.create_window((0, 0), window=self.ingredient_category_container, anchor='nw')
+
+        # Create dictionaries to store frames and listboxes for each ingredient category, and the rows each listbox shows
+        self.ingredient_category_frames = {}
+        self.category_listboxes = {}
+        self.shown_ingredient_rows = {}
+
+        # Categories currently packed, in order; those without matching ingredients are hidden while filtering
+        self.visible_categories = []
+
+        # Build the first categories now and queue the rest to be built while Tk is idle
+        self.pending_categories = deque(self.catalog.unique_ingredients)
+        self.category_build_job = None
+        self.build_pending_categories()
+
+        # Bind the resize event to update scroll region
+        self.ingredient_category_container.bind("<Configure>", self.update_scrollregion)
+
+    @profiled('render')
+    def build_pending_categories(self):
+        # Build the widgets of the next CATEGORY_BATCH_SIZE queued categories, showing the rows
+        # that match the filter box at the time, then come back when Tk is idle again
+        self.category_build_job = None
+        rows = self.ingredient_rows(filter_matches(self.ingredient_index, self.ingredient_filter_var))
+        for _ in range(min(CATEGORY_BATCH_SIZE, len(self.pending_categories))):
+            category = self.pending_categories.popleft()
+            self.add_category(category, rows.get(category, []))
+            self.visible_categories.append(category)
+        self.show_categories()
+        if self.pending_categories:
+            self.category_build_job = self.root.after_idle(self.build_pending_categories)
+
+    def ingredient_rows(self, matches=None):
+        # Listbox rows per category: each ingredient with the number of recipes using it, limited
+        # to the ingredient names in matches unless it is None; categories without rows are left out
+        if matches is None:
+            return self.all_ingredient_rows
+        rows = {}
+        for category, _, row in sorted(entry for ingredient in matches for entry in self.ingredient_row_table[ingredient]):
+            rows.setdefault(category, []).append(row)
+        return rows
+
+    @profiled('render')
+    def filter_ingredients(self):
+        # Show only the ingredients matching the filter box, keeping hidden ingredients selected;
+        # only the listboxes whose matching rows changed are refilled
+        rows = self.ingredient_rows(filter_matches(self.ingredient_index, self.ingredient_filter_var))
+        for category, category_listbox in self.category_listboxes.items():
+            category_rows = rows.get(category, [])
+            if category_rows != self.shown_ingredient_rows[category]:
+                fill_listbox(category_listbox, category_rows, ingredient_key, self.selected_ingredients[category])
+                self.shown_ingredient_rows[category] = category_rows
+        self.show_categories()
+
+    def show_categories(self):
+        # Pack the frames of the categories with ingredients to show, in catalog order
+        visible = [category for category, category_listbox in self.category_listboxes.items() if category_listbox.size() > 0]
+        if visible == self.visible_categories:
+            return
+        for category_frame in self.ingredient_category_frames.values():
+            category_frame.pack_forget()
+        for category in visible:
+            self.ingredient_category_frames[category].pack(fill='both', expand=True)
+        self.visible_categories = visible
+
+    def add_category(self, category, rows):
+        # Create a new frame for the current category inside the main container
+        category_frame = tk.Frame(self.ingredient_category_container)
+        category_frame.pack(fill='both', expand=True)
+
+        # Create and place a label for the category
+        category_label = tk.Label(category_frame, text=category, font=("Helvetica", 12, "bold"))
+        category_label.pack(side='top', padx=5, pady=5)
+
+        # Create and place a vertical scrollbar for the category listbox
+        category_scrollbar = tk.Scrollbar(category_frame, orient='vertical')
+        category_scrollbar.pack(side='right', fill='y')
+
+        # Create a listbox to display the ingredients for the current category
+        category_listbox = tk.Listbox(category_frame, yscrollcommand=category_scrollbar.set, selectmode='multiple', exportselection=False, width=30)
+        # Populate the listbox with the ingredients matching the filter and their counts, formatted for display, in a single insert call
+        category_listbox.insert(tk.END, *rows)
+        self.shown_ingredient_rows[category] = rows
+        selected = self.selected_ingredients.setdefault(category, set())
+        category_listbox.bind('<<ListboxSelect>>', lambda event: remember_selection(category_listbox, ingredient_key, selected))
+        category_listbox.pack(side='left', fill='both', expand=True)
+        # Configure scrolling for the listbox
+        category_listbox.config(yscrollcommand=category_scrollbar.set)
+        category_scrollbar.config(command=category_listbox.yview)
+
+        # Store the frame and listbox in the dictionaries for future reference
+        self.ingredient_category_frames[category] = category_frame
+        self.category_listboxes[category] = category_listbox
+
+    def update_scrollregion(self, event):
+        # Update scroll region when the size of the frame changes
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def build_output_column(self):
+        # Frame for output and controls
+        output_frame = tk.Frame(self.root)
+        output_frame.pack(side='left', fill='both', expand=True)
+
+        # Label for the ingredients section
+        ingredients_title_label = tk.Label(output_frame, text="Ingredients required", font=("Helvetica", 14, "bold"))
+        ingredients_title_label.pack(side='top', padx=10, pady=2)  # Reduced vertical padding
+
+        # Text widget for displaying the required ingredients
+        self.ingredients_text = tk.Text(output_frame, wrap="word", font=("Helvetica", 15))
+        self.ingredients_text.pack(fill="both", expand=True)
+
+        # Button to calculate the ingredients for the selected meals
+        calculate_button = tk.Button(output_frame, text="Calculate Ingredients", command=lambda: self.calculate_ingredients(self.selected_meal_names()))
+        calculate_button.pack(pady=2)  # Reduced vertical padding
+
+        # Label and entry for specifying the number of meals to suggest
+        num_meals_label = tk.Label(output_frame, text="Number of meals to suggest:", font=("Helvetica", 12))
+        num_meals_label.pack(pady=2)  # Reduced vertical padding
+        self.num_meals_entry = tk.Entry(output_frame)
+        self.num_meals_entry.pack(pady=2)  # Reduced vertical padding
+
+        # Checkbox to require meat in the suggested recipes
+        self.require_meat_var = tk.BooleanVar()
+        require_meat_checkbox = tk.Checkbutton(output_frame, text="Require Meat", variable=self.require_meat_var)
+        require_meat_checkbox.pack(pady=2)  # Reduced vertical padding
+
+        # Button to suggest recipes based on selected criteria
+        suggest_button = tk.Button(output_frame, text="Suggest Recipes", command=self.suggest_recipes)
+        suggest_button.pack(pady=2)  # Reduced vertical padding
+
+        # Buttons to page through the ranked alternative plans of the last suggestion without searching again
+        alternatives_frame = tk.Frame(output_frame)
+        alternatives_frame.pack(pady=2)  # Reduced vertical padding
+        self.previous_plan_button = tk.Button(alternatives_frame, text="< Previous Plan", command=lambda: self.show_plan(self.suggestion_rank - 1), state='disabled')
+        self.previous_plan_button.pack(side='left')
+        self.next_plan_button = tk.Button(alternatives_frame, text="Next Plan >", command=lambda: self.show_plan(self.suggestion_rank + 1), state='disabled')
+        self.next_plan_button.pack(side='left')
+
+        # Button to cancel a running search; the best combination found so far stays displayed
+        self.cancel_button = tk.Button(output_frame, text="Cancel", command=self.job_runner.cancel, state='disabled')
+        self.cancel_button.pack(pady=2)  # Reduced vertical padding
+
+        # Button to get the combined ingredient list from the suggested recipes
+        self.get_combined_button = tk.Button(output_frame, text="Get Combined Ingredient List", command=self.get_combined_ingredients)
+        self.get_combined_button.pack(pady=2)  # Reduced vertical padding
+
+    @profiled('render')
+    def show_text(self, text):
+        # Replace the contents of the ingredients_text widget
+        self.ingredients_text.delete(1.0, tk.END)
+        self.ingredients_text.insert(tk.END, text)
+
+    def calculate_ingredients(self, selected_recipes):
+        # Clear the existing text in the ingredients_text widget
+        self.ingredients_text.delete(1.0, tk.END)
+
+        # Add up the ingredients on the background job thread and show them when done
+        self.run_in_background(combine_job, (self.catalog, list(selected_recipes)),
+                               self.show_combined_ingredients, cancellable=False)
+
+    def show_combined_ingredients(self, job):
+        # Runs on the Tk main thread once the calculation job has finished
+        self.show_text(planner.format_combined_ingredients(job.result()))
+
+    def suggest_recipes(self):
+        # Clear the existing text in the ingredients_text widget
+        self.ingredients_text.delete(1.0, tk.END)
+
+        try:
+            # Get and validate the number of meals from the user input
+            num_meals = int(self.num_meals_entry.get())
+        except ValueError:
+            self.ingredients_text.insert(tk.END, "Please enter a valid number of meals.\n")
+            return
+
+        # Gather all selected ingredients, including any hidden by the filter
+        selected_ingredients = set().union(*self.selected_ingredients.values())
+
+        # Check if the user requires recipes with meat
+        require_meat = self.require_meat_var.get()
+
+        # Validate the number of meals
+        if num_meals <= 0 or num_meals > len(self.catalog.recipes):
+            self.ingredients_text.insert(tk.END, "Please enter a number between 1 and the total number of meals.\n")
+            return
+
+        # Run the search on the background job thread and show the best combination when done
+        self.run_in_background(planner.suggest_recipes, (self.catalog, selected_ingredients, num_meals, require_meat, SEARCH_WORKERS, SUGGESTION_ALTERNATIVES),
+                               lambda job: self.show_suggestions(job, selected_ingredients), describe_search_progress)
+
+    def show_suggestions(self, job, selected_ingredients):
+        # Runs on the Tk main thread once the suggestion search has finished or been cancelled
+        result = job.result()
+
+        if result is None:
+            if job.cancel_event.is_set():
+                self.show_text("Search cancelled before any combination was found.\n")
+            else:
+                # There aren't enough meat recipes to meet the requirement
+                self.show_text("There aren't that many recipes with the required meats.\n")
+            return
+
+        # Display the best combination of recipes and their ingredients
+        self.suggestion = result
+        self.suggestion_ingredients = selected_ingredients
+        self.show_plan(0)
+        self.get_combined_button.pack(pady=10)
+
+    def show_plan(self, rank):
+        # Display one of the ranked plans of the last suggestion and update the paging buttons
+        plan = self.suggestion.alternative(rank)
+        self.suggestion_rank = rank
+        self.suggested_recipes = planner.suggested_meals(self.catalog, plan)
+        self.show_text(planner.describe_plan(plan, rank) + planner.format_suggestions(self.catalog, plan, self.suggestion_ingredients))
+        self.previous_plan_button.config(state='normal' if rank > 0 else 'disabled')
+        self.next_plan_button.config(state='normal' if rank + 1 < len(plan.ranked) else 'disabled')
+
+    def get_combined_ingredients(self):
+        # Call the function to calculate ingredients based on the suggested recipes
+        self.calculate_ingredients(self.suggested_recipes)
+
+    def run_in_background(self, function, args, on_done, describe_progress=None, cancellable=True):
+        # Submit a job to the background thread, enable the Cancel button (for jobs that check
+        # for cancellation) and start polling it
+        job = self.job_runner.submit(function, *args)
+        self.progress_text = None
+        self.cancel_button.config(state='normal' if cancellable else 'disabled')
+        self.root.after(POLL_INTERVAL_MS, self.poll_job, job, on_done, describe_progress, self.catalog)
+
+    def poll_job(self, job, on_done, describe_progress, catalog):
+        # Check on a background job from the Tk main thread until it finishes
+        if job is not self.job_runner.current or catalog is not self.catalog:
+            # A newer job or a reload of the recipes has replaced this one, so its result is no longer wanted
+            return
+        if job.done():
+            self.cancel_button.config(state='disabled')
+            on_done(job)
+            return
+        if job.progress is not None and describe_progress is not None:
+            # Only redraw the output when the progress text has actually changed, comparing with
+            # the last text shown rather than reading the widget back through Tcl
+            text = describe_progress(*job.progress)
+            if text != self.progress_text:
+                self.show_text(text)
+                self.progress_text = text
+        self.root.after(POLL_INTERVAL_MS, self.poll_job, job, on_done, describe_progress, catalog)
+
+    def check_for_changes(self):
+        # Reload the recipes file in the background whenever it has been saved
+        if self.reload_job is None and self.watcher.changed():
+            self.reload_job = self.reload_runner.submit(reload_catalog, self.catalog, self.path)
+            self.root.after(POLL_INTERVAL_MS, self.poll_reload)
+        self.root.after(WATCH_INTERVAL_MS, self.check_for_changes)
+
+    def poll_reload(self):
+        # Wait for the reload job, then patch the widgets with the new catalog
+        if not self.reload_job.done():
+            self.root.after(POLL_INTERVAL_MS, self.poll_reload)
+            return
+        job, self.reload_job = self.reload_job, None
+        try:
+            catalog = job.result()
+        except Exception as e:
+            # Keep showing the old recipes; the next save triggers another attempt
+            print(f"Could not reload {self.path}: {e}")
+            return
+        for issue in catalog.format_issues:
+            print(issue)
+        self.apply_catalog(catalog)
+
+    @profiled('render')
+    def apply_catalog(self, catalog):
+        # Switch to a reloaded catalog, updating the listboxes in place rather than rebuilding them
+        self.job_runner.cancel()
+        self.cancel_button.config(state='disabled')
+        self.catalog = catalog
+
+        # Suggestions refer to recipes of the old catalog and can't be paged any more
+        self.suggestion = None
+        self.previous_plan_button.config(state='disabled')
+        self.next_plan_button.config(state='disabled')
+        self.suggested_recipes = [meal for meal in self.suggested_recipes if meal_key(meal) in catalog.recipes_by_meal]
+
+        # Bring the filter indexes up to date with only the names that were added or removed
+        self.meal_index.update(catalog.sorted_meals)
+        self.ingredient_index.update(catalog_ingredients(catalog))
+
+        self.build_row_tables()
+
+        self.selected_meals &= catalog.recipes_by_meal.keys()
+        self.shown_meal_rows = self.meal_rows(filter_matches(self.meal_index, self.meal_filter_var))
+        patch_listbox(self.meal_listbox, self.shown_meal_rows, meal_key, self.selected_meals)
+
+        for category in list(self.category_listboxes):
+            if category not in catalog.unique_ingredients:
+                self.ingredient_category_frames.pop(category).destroy()
+                del self.category_listboxes[category]
+                del self.shown_ingredient_rows[category]
+                del self.selected_ingredients[category]
+        rows = self.ingredient_rows(filter_matches(self.ingredient_index, self.ingredient_filter_var))
+        for category, category_listbox in self.category_listboxes.items():
+            selected = self.selected_ingredients[category]
+            selected &= set(catalog.unique_ingredients[category])
+            patch_listbox(category_listbox, rows.get(category, []), ingredient_key, selected)
+            self.shown_ingredient_rows[category] = rows.get(category, [])
+        self.show_categories()
+
+        # Categories not built yet, including new ones, are built in batches as on startup
+        self.pending_categories = deque(category for category in catalog.unique_ingredients if category not in self.category_listboxes)
+        if self.pending_categories and self.category_build_job is None:
+            self.build_pending_categories()
+
+        self.show_text(f"Recipes reloaded from {self.path}.\n")
+
+
+def run_gui(path=planner.RECIPES_PATH):
+    # Load the recipes, open the main window and run until it is closed
+    catalog = planner.load_recipes(path)
+
+    # Print all format issues encountered during the parsing
+    for issue in catalog.format_issues:
+        print(issue)
+
+    # Initialize the main Tkinter window
+    root = tk.Tk()
+    app = RecipesApp(root, catalog, path)
+
+    # Start the Tkinter event loop, which will keep the application running and responsive to user interactions
+    root.mainloop()
+
+    # Stop any search or reload that is still running once the window has been closed
+    app.job_runner.shutdown()
+    app.reload_runner.shutdown()
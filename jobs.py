@@ -0,0 +1,53 @@
+# Background execution of long-running GUI work. Jobs run on a worker thread so the Tk main
+# loop stays responsive; they never touch widgets themselves. Instead they publish progress
+# on the Job object, which the GUI polls with root.after, and stop cooperatively when the
+# job's cancel event is set.
+import threading # for the cooperative cancellation event
+from concurrent.futures import ThreadPoolExecutor # for running jobs off the Tk main thread
+
+
+class Job:
+    # One submitted piece of background work with its latest progress report
+    __slots__ = ('future', 'cancel_event', 'progress')
+
+    def __init__(self):
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.progress = None
+
+    def report(self, *progress):
+        # Called from the worker thread; the GUI only ever reads the latest report
+        self.progress = progress
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+
+class JobRunner:
+    # Runs one job at a time; submitting a new job cancels the one still running
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recipes2groceries-job')
+        self.current = None
+
+    def submit(self, function, *args):
+        # function is called as function(*args, progress=..., cancel=...)
+        if self.current is not None:
+            self.current.cancel()
+        job = Job()
+        job.future = self.executor.submit(function, *args, progress=job.report, cancel=job.cancel_event)
+        self.current = job
+        return job
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
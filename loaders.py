@@ -0,0 +1,115 @@
+# Streaming readers for recipe sources. Each loader is a generator yielding one
+# (row index, meal, favourite, ingredients string) tuple per recipe row, so the catalog is
+# compiled row by row and never holds more than one copy of the source in memory. Loaders are
+# chosen by file extension; register_loader() adds new formats.
+import csv # for reading CSV files line by line
+import os # for splitting file extensions
+import pathlib # for building the file: URI of SQLite databases
+import sqlite3 # for reading recipes from a SQLite table
+
+# Columns every recipe source must provide
+COLUMNS = ('Favourite', 'Meal', 'Ingredients')
+
+# Table read from SQLite databases
+SQLITE_TABLE = 'recipes'
+
+# Number of rows fetched from SQLite at a time
+SQLITE_CHUNK_SIZE = 1000
+
+
+def column_positions(header, path):
+    # Find the position of each required column in a header row
+    header = [str(name).strip() if name is not None else '' for name in header]
+    positions = []
+    for column in COLUMNS:
+        if column not in header:
+            raise ValueError(f"{path} is missing the '{column}' column")
+        positions.append(header.index(column))
+    return positions
+
+
+def iter_xlsx_rows(path):
+    # Stream the rows of the first worksheet with openpyxl in read-only mode
+    from openpyxl import load_workbook # for reading excel files without loading the whole workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        favourite_column, meal_column, ingredients_column = column_positions(next(rows, ()), path)
+        width = max(favourite_column, meal_column, ingredients_column) + 1
+        for index, row in enumerate(rows):
+            # Short rows are padded so missing trailing cells read as empty
+            row = tuple(row) + (None,) * (width - len(row))
+            yield index, row[meal_column], row[favourite_column], row[ingredients_column]
+    finally:
+        workbook.close()
+
+
+def csv_favourite(text):
+    # CSV cells are text, so "1" (or "1.0") is converted to compare equal to the number 1 as it
+    # does in excel and SQLite; anything that isn't a number (e.g. "yes") isn't a favourite
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def iter_csv_rows(path):
+    # Stream the rows of a CSV file with a Favourite, Meal, Ingredients header
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = csv.reader(f)
+        favourite_column, meal_column, ingredients_column = column_positions(next(rows, []), path)
+        width = max(favourite_column, meal_column, ingredients_column) + 1
+        for index, row in enumerate(rows):
+            row = row + [''] * (width - len(row))
+            yield index, row[meal_column], csv_favourite(row[favourite_column]), row[ingredients_column]
+
+
+def iter_sqlite_rows(path, table=SQLITE_TABLE):
+    # Stream the rows of a SQLite table with Favourite, Meal and Ingredients columns
+    # Opened read-only through a file: URI; as_uri() escapes characters such as '#' and '%' that
+    # would otherwise be read as part of the URI rather than the file name
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        quoted_table = '"' + table.replace('"', '""') + '"'
+        cursor = connection.execute(f"SELECT Favourite, Meal, Ingredients FROM {quoted_table} ORDER BY rowid")
+        index = 0
+        while True:
+            rows = cursor.fetchmany(SQLITE_CHUNK_SIZE)
+            if not rows:
+                break
+            for favourite, meal, ingredients in rows:
+                yield index, meal, favourite, ingredients
+                index += 1
+    finally:
+        connection.close()
+
+
+# File extension -> loader
+LOADERS = {
+    '.xlsx': iter_xlsx_rows,
+    '.xlsm': iter_xlsx_rows,
+    '.csv': iter_csv_rows,
+    '.db': iter_sqlite_rows,
+    '.sqlite': iter_sqlite_rows,
+    '.sqlite3': iter_sqlite_rows,
+}
+
+
+def register_loader(extension, loader):
+    # Use loader(path) for files ending in extension (e.g. '.tsv')
+    LOADERS[extension.lower()] = loader
+
+
+def iter_recipe_rows(path):
+    # Yield the recipe rows of a source, skipping rows with missing or empty 'Ingredients' fields
+    extension = os.path.splitext(path)[1].lower()
+    loader = LOADERS.get(extension)
+    if loader is None:
+        raise ValueError(f"Don't know how to read recipes from '{extension}' files")
+    for index, meal, favourite, ingredients in loader(path):
+        if ingredients is None:
+            continue
+        ingredients = str(ingredients)
+        if ingredients.strip() == '':
+            continue
+        yield index, meal, favourite, ingredients
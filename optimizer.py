@@ -0,0 +1,300 @@
+# Exact branch-and-bound search for the combination of recipes that needs the fewest
+# distinct missing ingredients. Candidates are explored depth-first, cheapest first, and
+# whole subtrees are pruned as soon as their lower bound can no longer beat the best plan (or,
+# when the top_k best plans are wanted, the k-th best plan kept in a bounded heap).
+import heapq # for the bounded heap of the top_k best plans
+import multiprocessing # for the shared best bound and the worker start method
+import sys # for the platform, which decides the worker start method
+import threading # for checking that no other threads are running before forking
+import time # for throttling progress reports
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait # for searching shards of the combination space in parallel
+from math import comb # for counting the combinations covered by each explored or pruned subtree
+import numpy as np # for the lower-bound and argmin steps over a node's scored candidates
+from scoring import popcount_rows, score_extensions
+from profiling import profiled # for the opt-in per-stage timings
+
+# Minimum number of seconds between two progress reports
+PROGRESS_INTERVAL = 0.1
+
+
+class SearchResult:
+    # The best combination found (recipe indices) and its missing-ingredient count; complete is
+    # False when the search was cancelled and this is only the best found so far. ranked holds
+    # every (combination, missing_count) plan kept by a top_k search, best first, so the
+    # alternatives can be paged through without searching again.
+    __slots__ = ('combination', 'missing_count', 'complete', 'ranked')
+
+    def __init__(self, combination, missing_count, complete=True, ranked=None):
+        self.combination = combination
+        self.missing_count = missing_count
+        self.complete = complete
+        self.ranked = ranked if ranked is not None else ((combination, missing_count),)
+
+    def alternative(self, rank):
+        # The plan at the given rank (0 is the best) as a SearchResult sharing this ranking
+        combination, missing_count = self.ranked[rank]
+        return SearchResult(combination, missing_count, self.complete, self.ranked)
+
+
+class BranchAndBound:
+    # Depth-first search over the ordered candidate matrix, keeping the top_k best plans in a
+    # bounded heap ranked by (missing count, combination); subtrees are pruned against the k-th
+    # best count once the heap is full. When shared_bound is given (a multiprocessing.Value
+    # holding the lowest k-th best count of any shard) subtrees that cannot even tie it are
+    # pruned too; ties are still explored so the merged answer matches the single-process
+    # search exactly. warm_bound is a known upper bound on the k-th best count (e.g. from the
+    # previous search's plans), pruned against in the same tie-preserving way before the heap
+    # fills up. progress(covered, total, best_count) is called every PROGRESS_INTERVAL seconds,
+    # where covered counts the combinations already evaluated or pruned; the search stops
+    # early once cancel.is_set() returns True.
+    def __init__(self, candidates, num_meals, shared_bound=None, progress=None, cancel=None, top_k=1, warm_bound=float('inf')):
+        self.candidates = candidates
+        self.num_meals = num_meals
+        self.shared_bound = shared_bound
+        self.warm_limit = warm_bound + 1
+        self.progress = progress
+        self.cancel = cancel
+        self.top_k = top_k
+        # Max-heap of (-count, negated combination, combination): the worst kept plan is on top
+        self.plans = []
+        self.best_count = float('inf')
+        self.best_combination = None
+        self.kth_count = float('inf')
+        self.cancelled = False
+        self.covered = 0
+        self.total = comb(len(candidates), num_meals)
+        self.last_report = time.monotonic()
+
+    def limit(self):
+        # Plans must use fewer missing ingredients than this to be worth exploring
+        if self.shared_bound is None:
+            return min(self.kth_count, self.warm_limit)
+        return min(self.kth_count, self.warm_limit, self.shared_bound.value + 1)
+
+    def record(self, count, combination):
+        # Plans arrive in depth-first (lexicographic) order, so a plan only displaces the worst
+        # kept plan when it needs strictly fewer missing ingredients
+        plan = (-count, tuple(-j for j in combination), combination)
+        if len(self.plans) < self.top_k:
+            heapq.heappush(self.plans, plan)
+        else:
+            heapq.heapreplace(self.plans, plan)
+        if count < self.best_count:
+            self.best_count = count
+            self.best_combination = combination
+        if len(self.plans) < self.top_k:
+            return
+        self.kth_count = -self.plans[0][0]
+        if self.shared_bound is not None:
+            with self.shared_bound.get_lock():
+                if self.kth_count < self.shared_bound.value:
+                    self.shared_bound.value = self.kth_count
+
+    def ranked_plans(self):
+        # The kept (count, combination) plans, best first
+        return sorted((-negated_count, combination) for negated_count, _, combination in self.plans)
+
+    def check_in(self):
+        # Poll for cancellation and report progress; returns False once the search should stop
+        if self.cancel is not None and self.cancel.is_set():
+            self.cancelled = True
+        if self.progress is not None and time.monotonic() - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = time.monotonic()
+            self.progress(self.covered, self.total, self.best_count)
+        return not self.cancelled
+
+    def search(self, start, needed, needed_size, chosen, remaining):
+        candidates = self.candidates
+        num_candidates = len(candidates)
+        if not self.check_in():
+            return
+
+        # Marginal number of new missing ingredients each remaining candidate would add
+        marginals = score_extensions(candidates[start:], needed)
+
+        if remaining == 1:
+            # Last pick: the cheapest marginal additions complete the best plans in this subtree
+            if self.top_k == 1:
+                offsets = [int(marginals.argmin())]
+            else:
+                offsets = np.argsort(marginals, kind='stable')[:self.top_k].tolist()
+            for offset in offsets:
+                count = needed_size + int(marginals[offset])
+                if count >= self.limit():
+                    break
+                self.record(count, chosen + [start + offset])
+            self.covered += num_candidates - start
+            return
+
+        # Lower bound: any `remaining` further picks add at least the remaining-th smallest marginal
+        if needed_size + np.partition(marginals, remaining - 1)[remaining - 1] >= self.limit():
+            self.covered += comb(num_candidates - start, remaining)
+            return
+
+        for offset in range(num_candidates - start - remaining + 1):
+            if self.cancelled:
+                return
+            marginal = int(marginals[offset])
+            j = start + offset
+            if needed_size + marginal >= self.limit():
+                self.covered += comb(num_candidates - j - 1, remaining - 1)
+                continue
+            self.search(j + 1, needed | candidates[j], needed_size + marginal, chosen + [j], remaining - 1)
+
+    def search_all(self):
+        self.search(0, np.zeros(self.candidates.shape[1], dtype=np.uint64), 0, [], self.num_meals)
+
+    def search_shard(self, first):
+        # Explore only the combinations whose first (lowest-ordered) pick is candidate `first`
+        needed = self.candidates[first]
+        needed_size = int(popcount_rows(needed[None, :])[0])
+        if needed_size >= self.limit():
+            return
+        if self.num_meals == 1:
+            self.record(needed_size, [first])
+        else:
+            self.search(first + 1, needed, needed_size, [first], self.num_meals - 1)
+
+
+# Per-process search inputs, inherited by (or sent once to) each worker through the pool
+# initializer; workers that aren't forked map the candidate matrix from _worker_memory
+_worker_memory = None
+_worker_candidates = None
+_worker_num_meals = None
+_worker_bound = None
+_worker_cancel = None
+_worker_top_k = None
+
+
+def _init_worker(candidates, num_meals, shared_bound, cancel, top_k):
+    global _worker_memory, _worker_candidates, _worker_num_meals, _worker_bound, _worker_cancel, _worker_top_k
+    if isinstance(candidates, tuple):
+        # (shared memory block name, shape) of the parent's candidate matrix
+        from multiprocessing import shared_memory # for mapping the parent's candidate matrix
+        name, shape = candidates
+        _worker_memory = shared_memory.SharedMemory(name=name)
+        candidates = np.ndarray(shape, dtype=np.uint64, buffer=_worker_memory.buf)
+        candidates.flags.writeable = False
+    _worker_candidates = candidates
+    _worker_num_meals = num_meals
+    _worker_bound = shared_bound
+    _worker_cancel = cancel
+    _worker_top_k = top_k
+
+
+def _search_shard(first):
+    search = BranchAndBound(_worker_candidates, _worker_num_meals, _worker_bound, cancel=_worker_cancel, top_k=_worker_top_k)
+    search.search_shard(first)
+    return search.ranked_plans()
+
+
+def pool_context():
+    # Fork lets the workers inherit the candidate matrix without pickling it, but it is only
+    # safe on Linux from a process with no other threads: macOS system libraries don't survive
+    # a fork, and forking the GUI (whose searches run on a background thread next to Tk) can
+    # deadlock the child. Everywhere else the workers start fresh, map the candidate matrix from
+    # shared memory and receive the other inputs once through the pool initializer.
+    methods = multiprocessing.get_all_start_methods()
+    if sys.platform.startswith('linux') and threading.active_count() == 1 and 'fork' in methods:
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _parallel_search(candidates, num_meals, workers, progress=None, cancel=None, top_k=1, warm_bound=float('inf')):
+    context = pool_context()
+    # Start the shared bound above any possible count (every item missing), or at the warm-start bound
+    no_bound = candidates.shape[1] * 64 + 1
+    shared_bound = context.Value('q', int(min(no_bound, warm_bound)))
+    worker_cancel = context.Event()
+    num_candidates = len(candidates)
+    total = comb(num_candidates, num_meals)
+
+    shard_results = {}
+    covered = 0
+    memory = None
+    shared_candidates = candidates
+    if context.get_start_method() != 'fork':
+        # Workers that aren't forked map the candidate matrix from shared memory rather than
+        # each receiving a pickled copy of it
+        from multiprocessing import shared_memory # for sharing the candidate matrix with the workers
+        memory = shared_memory.SharedMemory(create=True, size=max(1, candidates.nbytes))
+        np.ndarray(candidates.shape, dtype=np.uint64, buffer=memory.buf)[...] = candidates
+        shared_candidates = (memory.name, candidates.shape)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(shared_candidates, num_meals, shared_bound, worker_cancel, top_k)) as executor:
+            futures = {executor.submit(_search_shard, first): first for first in range(num_candidates - num_meals + 1)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    first = futures[future]
+                    shard_results[first] = future.result()
+                    covered += comb(num_candidates - first - 1, num_meals - 1)
+                if cancel is not None and cancel.is_set() and not worker_cancel.is_set():
+                    # Stop the running shards cooperatively and drop the ones that have not started
+                    worker_cancel.set()
+                    for future in pending:
+                        future.cancel()
+                if progress is not None:
+                    # With top_k > 1 the shared bound is the lowest k-th best count of any shard
+                    best_count = shared_bound.value
+                    progress(covered, total, best_count if best_count < no_bound else float('inf'))
+    finally:
+        if memory is not None:
+            memory.close()
+            memory.unlink()
+
+    # Ranking the union of the shards' plans by (count, combination) reproduces the
+    # single-process tie-breaking
+    plans = sorted(plan for shard_plans in shard_results.values() for plan in shard_plans)
+    return plans[:top_k], worker_cancel.is_set()
+
+
+def warm_start_bound(missing_words, num_meals, eligible, top_k, warm_start):
+    # Upper bound on the k-th best count from earlier plans (combinations of recipe indices),
+    # rescored against the current missing items; infinite if they can't provide one
+    plans = {tuple(combination) for combination in warm_start
+             if len(set(combination)) == num_meals and all(eligible[index] for index in combination)}
+    if len(plans) < top_k:
+        return float('inf')
+    counts = sorted(int(popcount_rows(np.bitwise_or.reduce(missing_words[list(plan)], axis=0)[None, :])[0]) for plan in plans)
+    return counts[top_k - 1]
+
+
+@profiled('search')
+def find_best_combination(missing_words, num_meals, eligible=None, workers=1, progress=None, cancel=None, top_k=1,
+                          missing_counts=None, warm_start=None):
+    # missing_words is a packed (recipes x words) matrix of each recipe's missing ingredient
+    # items and missing_counts their popcounts, if already known; eligible[i] says whether
+    # recipe i may be chosen at all (e.g. the "Require Meat" rule). With workers > 1 the search
+    # is sharded by first pick across worker processes. The top_k best plans are kept in
+    # SearchResult.ranked. warm_start is an optional list of earlier plans used to prune from
+    # the start; it never changes the result. See BranchAndBound for progress and cancel.
+    # Returns None if fewer than num_meals recipes are eligible, or if the search was
+    # cancelled before any combination was found.
+    if missing_counts is None:
+        missing_counts = popcount_rows(missing_words)
+    if eligible is None:
+        eligible = np.ones(len(missing_words), dtype=bool)
+
+    # Order the candidates by their number of missing ingredients so good plans are found early
+    order = np.flatnonzero(eligible)
+    order = order[np.argsort(missing_counts[order], kind='stable')]
+    if num_meals <= 0 or len(order) < num_meals:
+        return None
+    candidates = np.ascontiguousarray(missing_words[order])
+    warm_bound = warm_start_bound(missing_words, num_meals, eligible, top_k, warm_start) if warm_start else float('inf')
+
+    if workers > 1:
+        plans, cancelled = _parallel_search(candidates, num_meals, workers, progress, cancel, top_k, warm_bound)
+    else:
+        search = BranchAndBound(candidates, num_meals, progress=progress, cancel=cancel, top_k=top_k, warm_bound=warm_bound)
+        search.search_all()
+        plans, cancelled = search.ranked_plans(), search.cancelled
+    if not plans:
+        return None
+    ranked = tuple((tuple(int(order[j]) for j in combination), count) for count, combination in plans)
+    return SearchResult(*ranked[0], complete=not cancelled, ranked=ranked)
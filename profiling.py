@@ -0,0 +1,93 @@
+# Opt-in per-stage instrumentation. Functions decorated with @profiled(stage) and blocks run
+# under `with stage(name):` add their wall time and a call to the stage's totals, but only
+# while profiling is enabled: by the --profile command line flag, by setting the
+# RECIPES2GROCERIES_PROFILE environment variable, or by calling enable(). Otherwise the cost
+# is one flag check per call. Stages nest (e.g. "parse" time is also part of "compile"), and
+# work done in worker processes is not included.
+import functools # for keeping the names of decorated functions
+import json # for the report format
+import os # for the environment variable switch
+import sys # for writing the report to standard error
+import threading # for a lock, as GUI jobs record from a background thread
+import time # for wall-clock timing
+from contextlib import contextmanager # for the stage() block form
+
+# Environment variable that turns profiling on for every run
+PROFILE_ENV = 'RECIPES2GROCERIES_PROFILE'
+
+# Values of PROFILE_ENV that leave profiling off, besides an empty value
+PROFILE_OFF_VALUES = ('0', 'false', 'no', 'off')
+
+
+def env_enabled(value):
+    # Whether a PROFILE_ENV value turns profiling on: any non-empty value except 0, false, no or off
+    return bool(value) and value.strip().lower() not in PROFILE_OFF_VALUES
+
+
+_enabled = env_enabled(os.environ.get(PROFILE_ENV, ''))
+# Stage name -> [calls, seconds]
+_stages = {}
+_lock = threading.Lock()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def record(name, seconds):
+    with _lock:
+        totals = _stages.setdefault(name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+
+def profiled(name):
+    # Decorator timing every call of a function as part of stage `name`
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def stage(name):
+    # Time a block of code as one call of stage `name`
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report():
+    # {stage: {'calls': n, 'seconds': s}} for every stage recorded so far
+    with _lock:
+        return {name: {'calls': calls, 'seconds': round(seconds, 6)} for name, (calls, seconds) in sorted(_stages.items())}
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def emit(stream=None, **sections):
+    # Write the report as one line of JSON, to standard error by default; keyword arguments add
+    # further top-level sections (e.g. cache counters) next to the stage timings
+    stream = stream if stream is not None else sys.stderr
+    stream.write(json.dumps({'profile': report(), **sections}) + '\n')
@@ -0,0 +1,64 @@
+# Unit handling for combining ingredient amounts. Pint is only used to work out, once per
+# distinct unit, which canonical base unit it belongs to and the factor to convert to it. The
+# resulting table is stored with the compiled catalog, so adding up a recipe line is a dict
+# lookup and one float multiply, and amounts of the same ingredient given in different units
+# of the same kind (e.g. oz and g) are converted before they are added together.
+from functools import lru_cache # for memoising pint parsing of repeated amount strings
+from profiling import profiled # for the opt-in per-stage timings
+
+# Unit used for plain counts such as "1" or "0.5"
+COUNT_UNIT = 'x'
+
+# Maximum number of distinct amount strings remembered by parse_quantity
+QUANTITY_CACHE_SIZE = 1024
+
+# Shared pint UnitRegistry, created on first use
+_unit_registry = None
+
+
+def get_unit_registry():
+    # Import UnitRegistry from pint and build the registry the first time a unit is parsed
+    global _unit_registry
+    if _unit_registry is None:
+        from pint import UnitRegistry # for handling and converting units of measurement
+        _unit_registry = UnitRegistry()
+    return _unit_registry
+
+
+@lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def parse_quantity(text):
+    # Parse an amount such as "10oz", "2 tbsp" or "1" with pint. Returns the magnitude, the
+    # canonical base unit, the factor converting one of the amount's units to that base unit
+    # and the unit's display name.
+    quantity = get_unit_registry()(text)
+    if not hasattr(quantity, 'units'):
+        # Pint returns plain numbers for amounts without a unit
+        return float(quantity), COUNT_UNIT, 1.0, COUNT_UNIT
+    base = (1 * quantity.units).to_base_units()
+    return float(quantity.magnitude), str(base.units), float(base.magnitude), str(quantity.units)
+
+
+@profiled('units')
+def unit_conversion(unit):
+    # (canonical unit, factor, display name) for a unit as written in the recipes, e.g. "oz"
+    if unit is None:
+        return COUNT_UNIT, 1.0, COUNT_UNIT
+    try:
+        _, canonical, factor, display = parse_quantity('1 ' + unit)
+    except (AttributeError, ValueError, TypeError):
+        # Units pint doesn't know (e.g. "clove") are kept as they are and only added to themselves
+        return unit, 1.0, unit
+    return canonical, factor, display
+
+
+def build_unit_table(recipes, known=None):
+    # Precompute the conversion of every unit used by the recipes, reusing the conversions
+    # already in known (e.g. the table of the previous version of the workbook)
+    known = known or {}
+    units = {line.unit for recipe in recipes for line in recipe.lines}
+    return {unit: known[unit] if unit in known else unit_conversion(unit) for unit in units}
+
+
+def format_amount(amount):
+    # Amounts are shown with at most two decimals and without trailing zeros
+    return f"{round(amount, 2):g}"
@@ -1,466 +1,297 @@
 # Import packages
-import pandas as pd # for data manipulation and analysis
-import tkinter as tk # for creating graphical user interface (GUI) components
-from tkinter import ttk
-from pint import UnitRegistry # for handling and converting units of measurement
-from itertools import combinations # to generate possible combinations of items
-import re   # for regular expression operations, useful for pattern matching and text manipulation
+import sys # for the command line arguments and error output
+from catalog_cache import load_cached_catalog # for loading the compiled catalog, cached next to the workbook
+from collections import Counter # for counting repeated meals in a grocery-list cache key
+from quantities import format_amount # for showing ingredient amounts
+import profiling # for the opt-in --profile report
+from result_cache import ResultCache # for reusing suggestions and grocery lists of recent selections
+
+# Heavy packages are only imported by the code paths that need them: openpyxl and pint when the
+# workbook has to be parsed, NumPy when suggestions are searched or ingredients combined and
+# tkinter when the GUI is opened. This keeps scripts and the command line quick to start.
 
 ### Path to recipes excel file
-df = pd.read_excel('recipes.xlsx')
-
-# Import UnitRegistry and Quantity from pint
-ureg = UnitRegistry()
-Q_ = ureg.Quantity
-
-def format_ingredients(ingredients):
-    # Clear the existing text in the ingredients_text widget
-    ingredients_text.delete(1.0, tk.END)
-    
-    # Initialize a variable to keep track of the current category
-    current_category = None
-    
-    # Iterate over each ingredient and its associated information
-    for ingredient, info in ingredients.items():
-        category = info['category']  # Get the category of the current ingredient
-        
-        # Check if the current ingredient's category is different from the previous one
-        if category != current_category:
-            # If it's not the first category, add a newline for separation
-            if current_category is not None:
-                ingredients_text.insert(tk.END, '\n')
-            
-            # Insert the category name and a line of dashes under it
-            ingredients_text.insert(tk.END, f"{category}\n")
-            ingredients_text.insert(tk.END, '-' * len(category) + '\n')
-            
-            # Update the current category to the new one
-            current_category = category
-        
-        # Create the ingredient text with its amount, unit, and name
-        text = f"{info['amount']} {info['unit']} {ingredient}\n"
-        
-        # Insert the formatted ingredient text into the ingredients_text widget
-        ingredients_text.insert(tk.END, text)
-
-
-
-def calculate_ingredients(selected_recipes):
-    # Clear the existing text in the ingredients_text widget
-    ingredients_text.delete(1.0, tk.END)
-    
-    # Initialize dictionaries and sets to store ingredient details and encountered categories
-    total_ingredients = {}
-    categories_encountered = set()
-
-    # Iterate over each selected recipe
-    for recipe in selected_recipes:
-        # Remove leading star and spaces from the recipe name
-        recipe_name = recipe.lstrip('* ')
-        
-        # Retrieve the row corresponding to the current recipe from the DataFrame
-        row = df[df['Meal'] == recipe_name].iloc[0]
-        
-        # Insert the recipe name into the ingredients_text widget
-        ingredients_text.insert(tk.END, f"{recipe_name}\n")
-        
-        # Split the ingredients string into individual ingredients with categories
-        ingredients_with_categories = row['Ingredients'].strip("{}").split(', ')
-        
-        # Process each ingredient in the recipe
-        for ingredient_with_category in ingredients_with_categories:
-            parts = ingredient_with_category.split(':')
-            
-            # Parse the ingredient details based on the number of parts
-            if len(parts) == 3:
-                category, ingredient, amount_with_unit = parts
-            elif len(parts) == 2:
-                category, ingredient_amount = parts
-                print(f"Error parsing ingredient amount in recipe '{recipe}': {ingredient_amount}")
-                continue
-            else:
-                print(f"Error parsing ingredient amount in recipe '{recipe}': {ingredient_with_category}")
-                continue
-
-            # Add the category to the set of encountered categories
-            categories_encountered.add(category)
-            
-            try:
-                # Use regular expressions to extract the unit from the amount_with_unit string
-                match = re.search(r'([a-zA-Z]+)', amount_with_unit)
-                if match:
-                    amount_unit = match.group(1)
-                    amount_value = amount_with_unit.replace(amount_unit, '').strip()
-                else:
-                    # If no unit is found, set amount_unit to None
-                    amount_value = amount_with_unit
-                    amount_unit = None
-                    # Uncomment the following line if you want to print a warning message
-                    # print(f"Warning: No unit found for '{ingredient}' in recipe '{recipe}'.")
-
-                # Convert the amount_value and amount_unit to a standard unit using Pint
-                if amount_unit:
-                    amount_in_standard_units = ureg(amount_value + ' ' + amount_unit)
-                else:
-                    amount_in_standard_units = ureg(amount_value)
-                    
-                # Handle cases where the unit cannot be parsed
-                try:
-                    # Update the total amount of the ingredient in the total_ingredients dictionary
-                    if ingredient in total_ingredients:
-                        total_ingredients[ingredient]['amount'] += amount_in_standard_units.magnitude
-                    else:
-                        total_ingredients[ingredient] = {'amount': amount_in_standard_units.magnitude, 'unit': str(amount_in_standard_units.units), 'category': category}
-                except AttributeError:
-                    # If an AttributeError occurs, handle it by treating the amount as raw value
-                    if ingredient in total_ingredients:
-                        total_ingredients[ingredient]['amount'] += amount_in_standard_units
-                    else:
-                        total_ingredients[ingredient] = {'amount': amount_in_standard_units, 'unit': str('x'), 'category': category}
-            
-            except ValueError as e:
-                # Print and record any errors encountered while processing the amount
-                print(f"Error processing amount '{amount_with_unit}' in recipe '{recipe}', ingredient '{ingredient}': {e}")
-                format_issues.append(f"Error processing amount '{amount_with_unit}' in recipe '{recipe}', ingredient '{ingredient}': {e}")
-
-    # Sort the categories alphabetically
-    sorted_categories = sorted(categories_encountered)
-    
-    # Insert each category and its ingredients into the ingredients_text widget
-    for category in sorted_categories:
-        ingredients_text.insert(tk.END, f"{category}\n")
-        ingredients_text.insert(tk.END, '-' * len(category) + '\n')
-        for ingredient, info in total_ingredients.items():
-            if info['category'] == category:
-                # Format the ingredient text including its amount, unit, and name
-                text = f"{info['amount']} {info['unit']} {ingredient}\n"
-                ingredients_text.insert(tk.END, text)
-        # Add a newline after listing all ingredients for a category
-        ingredients_text.insert(tk.END, '\n')
+RECIPES_PATH = 'recipes.xlsx'
 
+# Number of recent suggestions and grocery lists remembered
+RESULT_CACHE_SIZE = 64
 
+# Results of recent suggest_recipes and combine_ingredients calls
+suggestion_cache = ResultCache(RESULT_CACHE_SIZE)
+grocery_cache = ResultCache(RESULT_CACHE_SIZE)
 
-def suggest_recipes():
-    # Clear the existing text in the ingredients_text widget
-    ingredients_text.delete(1.0, tk.END)
-    
-    try:
-        # Get and validate the number of meals from the user input
-        num_meals = int(num_meals_entry.get())
-    except ValueError:
-        ingredients_text.insert(tk.END, "Please enter a valid number of meals.\n")
-        return
 
-    # Gather all selected ingredients from the listboxes
-    selected_ingredients = []
-    for category, category_listbox in category_listboxes.items():
-        selected_ingredients += [category_listbox.get(i).split('\t')[-1].strip() for i in category_listbox.curselection()]
+def load_recipes(path=RECIPES_PATH):
+    # Load the compiled recipe catalog for the given workbook; results cached for a previous
+    # load no longer apply, so the result caches are emptied
+    clear_result_caches()
+    return load_cached_catalog(path)
+
+
+def reload_recipes(catalog, path=RECIPES_PATH):
+    # Load a changed workbook, reparsing only the rows that were added or changed since catalog
+    # was compiled
+    from catalog import load_catalog # for compiling the workbook against the previous catalog
+    clear_result_caches()
+    return load_cached_catalog(path, loader=lambda path: load_catalog(path, previous=catalog))
+
+
+def clear_result_caches():
+    suggestion_cache.clear()
+    grocery_cache.clear()
+
 
-    # Check if the user requires recipes with meat
-    require_meat = require_meat_var.get()
+def result_cache_stats():
+    # Hit and miss counters of the result caches, as reported by --profile
+    return {'suggestions': suggestion_cache.stats(), 'grocery_lists': grocery_cache.stats()}
+
+
+def get_incidence(catalog):
+    # The catalog's packed recipe x ingredient incidence matrix, compiled on first use
+    if catalog.incidence is None:
+        from scoring import IncidenceMatrix # for scoring recipe combinations with packed bitmasks
+        catalog.incidence = IncidenceMatrix(catalog)
+    return catalog.incidence
+
+
+def get_pantry_state(catalog):
+    # The catalog's incremental pantry scoring state, created on first use
+    if catalog.pantry_state is None:
+        from scoring import PantryState # for rescoring only the recipes affected by a pantry change
+        catalog.pantry_state = PantryState(catalog, get_incidence(catalog))
+    return catalog.pantry_state
+
+
+def suggest_recipes(catalog, selected_ingredients, num_meals, require_meat=False, workers=1, top_k=1, progress=None, cancel=None):
+    # Find the num_meals recipes that together need the fewest ingredients outside the pantry
+    # selection. Returns an optimizer.SearchResult whose ranked attribute holds the top_k best
+    # plans, or None if there aren't enough recipes using a selected meat (with require_meat)
+    # or the search was cancelled before finding any.
+    from optimizer import find_best_combination # for searching for the best combination of recipes
 
     # Validate the number of meals
-    if num_meals <= 0 or num_meals > len(df):
-        ingredients_text.insert(tk.END, "Please enter a number between 1 and the total number of meals.\n")
-        return
-
-    # Initialize lists to store recipes based on whether they include meat
-    recipe_scores = {}
-    meat_recipes = []
-    non_meat_recipes = []
-
-    # Process each recipe in the DataFrame
-    for index, row in df.iterrows():
-        # Extract and parse ingredients from the recipe
-        ingredients_with_categories = row['Ingredients'].strip("{}").split(', ')
-        ingredients_in_recipe = []
-        for ingredient_with_category in ingredients_with_categories:
-            parts = ingredient_with_category.split(':')
-            if len(parts) == 3:
-                category, ingredient, amount_with_unit = parts
-            elif len(parts) == 2:
-                category, ingredient_amount = parts
-                amount_with_unit = ingredient_amount
-                continue
+    if num_meals <= 0 or num_meals > len(catalog.recipes):
+        raise ValueError("Please enter a number between 1 and the total number of meals.")
+
+    # Reuse the result of an earlier search with the same pantry and options; the number of
+    # workers doesn't change the answer, so it isn't part of the key
+    key = (catalog.version, frozenset(selected_ingredients), num_meals, bool(require_meat), top_k)
+    result = suggestion_cache.get(key)
+    if result is not None:
+        return result
+
+    # Bring the pantry state up to date: only the recipes using an added or removed ingredient are rescored
+    state = get_pantry_state(catalog)
+    state.update(selected_ingredients)
+
+    # Search for the combination with the fewest missing ingredients; with require_meat only
+    # recipes using a selected meat may be chosen. The plans of the previous search for the
+    # same number of meals give the search a good bound to prune against from the start.
+    warm_start = state.previous[1] if state.previous is not None and state.previous[0] == num_meals else None
+    result = find_best_combination(state.missing_words, num_meals, eligible=state.meat_flags() if require_meat else None,
+                                   workers=workers, progress=progress, cancel=cancel, top_k=top_k,
+                                   missing_counts=state.missing_counts, warm_start=warm_start)
+    if result is not None:
+        state.previous = (num_meals, [combination for combination, _ in result.ranked])
+    # Cancelled searches only hold the best plans found so far, so they aren't remembered
+    if result is not None and result.complete:
+        suggestion_cache.put(key, result)
+    return result
+
+
+def suggested_meals(catalog, result):
+    # Meal names of a suggestion, in catalog order
+    return [catalog.recipes[index].meal for index in sorted(result.combination)]
+
+
+def describe_plan(result, rank):
+    # Heading for one of the ranked alternatives of a suggestion
+    return f"Plan {rank + 1} of {len(result.ranked)}: {result.ranked[rank][1]} missing ingredients\n\n"
+
+
+def format_suggestions(catalog, result, selected_ingredients):
+    # Text listing each suggested meal with the ingredients it still needs
+    text = []
+    if not result.complete:
+        text.append("Search cancelled, showing the best combination found so far.\n\n")
+    for index in sorted(result.combination):
+        recipe = catalog.recipes[index]
+        missing_lines = [line for line in recipe.lines if line.ingredient not in selected_ingredients]
+        text.append(f"{recipe.meal} (Missing {len(missing_lines)} ingredients)\n")
+        text.append('-' * len(recipe.meal) + '\n')
+        for line in missing_lines:
+            text.append(f"{line.formatted}\n")
+        text.append('\n')
+    return ''.join(text)
+
+
+def get_line_columns(catalog):
+    # The catalog's columnar ingredient lines, compiled on first use
+    if catalog.line_columns is None:
+        from aggregation import LineColumns # for the columnar copy of the ingredient lines
+        catalog.line_columns = LineColumns(catalog)
+    return catalog.line_columns
+
+
+def combine_ingredients(catalog, selected_recipes):
+    # Add up the ingredients of the selected recipes into an aggregation.GroceryList. Amounts of
+    # one ingredient in different units of the same kind are converted before they are added;
+    # amounts of different kinds are listed separately. The whole selection is added up in one
+    # grouped reduction, so there is no progress to report and nothing to cancel part way.
+    from aggregation import GroceryList, aggregate # for the grouped reduction of the selected lines
+
+    # Remove leading stars and spaces from the recipe names and look them up in the meal index
+    recipe_names = [recipe.lstrip('* ') for recipe in selected_recipes]
+    recipe_indices = [catalog.recipes_by_meal[recipe_name].index for recipe_name in recipe_names]
+
+    # The grocery list doesn't depend on the order the meals were selected in, only on which
+    # meals (and how many times each) were selected
+    key = (catalog.version, frozenset(Counter(recipe_names).items()))
+    grocery_list = grocery_cache.get(key)
+    if grocery_list is not None:
+        return GroceryList(recipe_names, grocery_list.sections)
+
+    grocery_list = aggregate(catalog, get_line_columns(catalog), recipe_names, recipe_indices)
+    grocery_cache.put(key, grocery_list)
+    return grocery_list
+
+
+def format_combined_ingredients(grocery_list):
+    # Text of the combined grocery list: the recipe names, then each category and its ingredients
+    text = [f"{recipe_name}\n" for recipe_name in grocery_list.meals]
+    for category, items in grocery_list.sections:
+        text.append(f"{category}\n")
+        text.append('-' * len(category) + '\n')
+        for item in items:
+            # Format the ingredient text including its amount, unit, and name; amounts that
+            # couldn't be parsed are shown as written
+            if item.amount is None:
+                text.append(f"{item.unit} {item.ingredient}\n")
             else:
-                continue
-
-            # Format the amount and unit of the ingredient
-            match = re.search(r'(\d*\.?\d+)\s*(\w+)?', amount_with_unit)
-            if match:
-                amount_value = match.group(1)
-                amount_unit = match.group(2) if match.group(2) else ''
-                if amount_unit:
-                    formatted_amount_with_unit = f"{amount_value} {amount_unit} {ingredient}"
-                else:
-                    formatted_amount_with_unit = f"{amount_value} x {ingredient}"  # Use "x" for count only
-            else:
-                formatted_amount_with_unit = f"1 x {ingredient}"  # Default format if no match
+                text.append(f"{format_amount(item.amount)} {item.unit} {item.ingredient}\n")
+        # Add a newline after listing all ingredients for a category
+        text.append('\n')
+    return ''.join(text)
 
-            ingredients_in_recipe.append((category, ingredient, formatted_amount_with_unit))
 
-        # Check if the recipe contains any selected meat ingredients
-        has_meat_ingredient = any(category.lower() == 'meat' and ingredient in selected_ingredients for category, ingredient, _ in ingredients_in_recipe)
+def split_names(values):
+    # Turn repeated and/or comma-separated command line values into a list of names
+    return [name.strip() for value in values or [] for name in value.split(',') if name.strip()]
 
-        # Identify missing ingredients in the current recipe
-        missing_ingredients = [(category, ingredient, formatted_amount_with_unit) for category, ingredient, formatted_amount_with_unit in ingredients_in_recipe if ingredient not in selected_ingredients]
 
-        # Categorize recipes based on meat requirement
-        if require_meat:  # If the checkbox is checked
-            if has_meat_ingredient:
-                meat_recipes.append((row['Meal'], missing_ingredients))
-            else:
-                continue
-        else:
-            if not has_meat_ingredient:
-                non_meat_recipes.append((row['Meal'], missing_ingredients))
-            else:
-                meat_recipes.append((row['Meal'], missing_ingredients))
-
-    num_meat_recipes = len(meat_recipes)
-    num_non_meat_recipes = len(non_meat_recipes)
-
-    # Check if there are enough meat recipes to meet the requirement
-    if require_meat and num_meat_recipes < num_meals:
-        ingredients_text.insert(tk.END, "There aren't that many recipes with the required meats.\n")
-        return
-
-    # Determine possible combinations of recipes to suggest
-    if require_meat:
-        if num_meat_recipes >= num_meals:
-            possible_combinations = [combo for combo in combinations(meat_recipes, num_meals)]
-        else:
-            required_non_meat = num_meals - num_meat_recipes
-            required_non_meat = min(required_non_meat, num_non_meat_recipes)
-            possible_combinations = [combo for combo in combinations(meat_recipes, num_meat_recipes) 
-                                     for non_meat_combo in combinations(non_meat_recipes, required_non_meat)
-                                     if len(combo) + len(non_meat_combo) == num_meals]
-    else:
-        possible_combinations = [combo for combo in combinations(meat_recipes + non_meat_recipes, num_meals)]
-
-    # Find the combination with the fewest missing ingredients
-    best_combination = None
-    min_missing_ingredients = float('inf')
-
-    for combo in possible_combinations:
-        unique_ingredients_needed = set()
-        missing_ingredient_count = 0
-
-        for meal, missing_ingredients in combo:
-            for category, ingredient, formatted_amount_with_unit in missing_ingredients:
-                if (category, ingredient) not in unique_ingredients_needed:
-                    unique_ingredients_needed.add((category, ingredient))
-                    missing_ingredient_count += 1  # Count each missing ingredient
-
-        if missing_ingredient_count < min_missing_ingredients:
-            min_missing_ingredients = missing_ingredient_count
-            best_combination = combo
-
-    # Display the best combination of recipes and their ingredients
-    if best_combination:
-        suggested_recipes.clear()
-        for meal, missing_ingredients in best_combination:
-            suggested_recipes.append(meal)
-            ingredients_text.insert(tk.END, f"{meal} (Missing {len(missing_ingredients)} ingredients)\n")
-            ingredients_text.insert(tk.END, '-' * len(meal) + '\n')
-            for category, ingredient, formatted_amount_with_unit in missing_ingredients:
-                if ingredient not in selected_ingredients:
-                    ingredients_text.insert(tk.END, f"{formatted_amount_with_unit}\n")
-            ingredients_text.insert(tk.END, '\n')
-        get_combined_button.pack(pady=10)
-
-
-
-def get_combined_ingredients():
-    # Call the function to calculate ingredients based on the suggested recipes
-    calculate_ingredients(suggested_recipes)
-
-
-# Clean the DataFrame by removing rows with missing or empty 'Ingredients' fields
-df = df.dropna(subset=['Ingredients'])
-df = df[df['Ingredients'].str.strip() != '']
-
-# Initialize lists and dictionaries to track format issues and unique ingredients
-format_issues = []
-unique_ingredients = {}
-ingredient_counts = {}
-
-# Iterate over each row in the DataFrame to process ingredients
-for index, row in df.iterrows():
-    # Extract and parse the ingredients with their categories
-    ingredients_with_categories = row['Ingredients'].strip("{}").split(', ')
-    for ingredient_with_category in ingredients_with_categories:
-        parts = ingredient_with_category.split(':')
-        
-        # Check if the ingredient format is valid
-        if len(parts) == 3:
-            category, ingredient, amount_with_unit = parts
-        elif len(parts) == 2:
-            category, ingredient_amount = parts
-            # Log issues with ingredient amount format
-            format_issues.append(f"Error parsing ingredient amount in row {index}: {ingredient_amount}")
-            continue
-        else:
-            # Log issues with ingredient format
-            format_issues.append(f"Error parsing ingredient amount in row {index}: {ingredient_with_category}")
-            continue
-
-        # Add the ingredient to the appropriate category set
-        if category not in unique_ingredients:
-            unique_ingredients[category] = set()
-        unique_ingredients[category].add(ingredient)
-        
-        # Update the count of the ingredient
-        ingredient_counts[ingredient] = ingredient_counts.get(ingredient, 0) + 1
-
-# Print all format issues encountered during the parsing
-for issue in format_issues:
-    print(issue)
-
-# Sort the unique ingredients in each category
-for category in unique_ingredients:
-    unique_ingredients[category] = sorted(unique_ingredients[category])
-
-
-# Sort the DataFrame by 'Meal' column to ensure meals are listed in alphabetical order
-df = df.sort_values(by='Meal')
-# Create a list of sorted meal names
-sorted_meals = df['Meal'].tolist()
-
-# Initialize the main Tkinter window
-root = tk.Tk()
-root.title("Meal Ingredients Calculator")  # Set the title of the window
-root.geometry("1000x700")  # Set the dimensions of the window
-
-# Create a frame to hold the list of meals
-meals_frame = tk.Frame(root)
-meals_frame.pack(side='left', fill='both', expand=True)
-
-# Create and place a label for the meals section
-meals_title_label = tk.Label(meals_frame, text="Select Meals", font=("Helvetica", 14, "bold"))
-meals_title_label.pack(side='top', padx=10, pady=5)
-
-# Create and place a vertical scrollbar for the meal listbox
-meal_scrollbar = tk.Scrollbar(meals_frame, orient='vertical')
-meal_scrollbar.pack(side='right', fill='y')
-
-# Create a listbox to display the meals, allowing multiple selections
-meal_listbox = tk.Listbox(meals_frame, yscrollcommand=meal_scrollbar.set, selectmode='multiple', width=35)
-# Populate the listbox with meals and mark favourites with a leading '*'
-for meal, favourite in zip(df['Meal'], df['Favourite']):
-    if favourite == 1:
-        meal_listbox.insert(tk.END, f"* {meal}")
+def main(argv=None):
+    # Command line entry point: `python -m recipes2groceries [gui|plan|list|batch] ...`
+    import argparse # for parsing the command line
+
+    parser = argparse.ArgumentParser(prog='recipes2groceries', description="Generate grocery lists from a selection of your custom recipes.")
+    parser.add_argument('--recipes', default=RECIPES_PATH, help="path to the recipes excel, CSV or SQLite file (default: %(default)s)")
+    parser.add_argument('--profile', action='store_true', help="print per-stage wall times and call counts as JSON to standard error when done")
+    commands = parser.add_subparsers(dest='command')
+
+    commands.add_parser('gui', help="open the graphical interface (the default)")
+
+    plan_parser = commands.add_parser('plan', help="suggest meals that need the fewest extra ingredients")
+    plan_parser.add_argument('--pantry', action='append', help="ingredients you already have, comma separated (repeatable)")
+    plan_parser.add_argument('--meals', type=int, required=True, help="number of meals to suggest")
+    plan_parser.add_argument('--require-meat', action='store_true', help="only suggest meals using one of the selected meats")
+    plan_parser.add_argument('--workers', type=int, default=1, help="worker processes for the search (default: %(default)s)")
+    plan_parser.add_argument('--alternatives', type=int, default=1, help="number of ranked plans to print, best first (default: %(default)s)")
+    plan_parser.add_argument('--combined', action='store_true', help="also print the combined ingredient list of the suggested meals")
+
+    list_parser = commands.add_parser('list', help="print the combined ingredient list for some meals")
+    list_parser.add_argument('--meals', action='append', required=True, help="meal names, comma separated (repeatable)")
+    list_parser.add_argument('--format', choices=('text', 'json'), default='text', help="output format (default: %(default)s)")
+
+    batch_parser = commands.add_parser('batch', help="plan one JSON request per line, writing one JSON result per line")
+    batch_parser.add_argument('input', nargs='?', default='-', help="requests file, or - for standard input (the default)")
+    batch_parser.add_argument('--output', default='-', help="results file, or - for standard output (the default)")
+    batch_parser.add_argument('--workers', type=int, default=1, help="worker processes planning requests in parallel (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    try:
+        return run_command(parser, args)
+    finally:
+        # With --profile or RECIPES2GROCERIES_PROFILE set, report the per-stage timings and the
+        # result cache counters of this run
+        if profiling.is_enabled():
+            profiling.emit(result_caches=result_cache_stats())
+
+
+def run_command(parser, args):
+    # Run the command chosen on the command line
+    if args.command in (None, 'gui'):
+        from gui import run_gui # imports tkinter
+        run_gui(args.recipes)
+        return 0
+
+    try:
+        catalog = load_recipes(args.recipes)
+    except (OSError, ValueError) as e:
+        # A missing or unreadable recipes file, or one of an unsupported type
+        parser.error(f"could not load {args.recipes}: {e}")
+    # Report any format issues encountered while parsing the workbook
+    for issue in catalog.format_issues:
+        print(issue, file=sys.stderr)
+
+    if args.command == 'plan':
+        selected_ingredients = set(split_names(args.pantry))
+        if args.alternatives < 1:
+            parser.error("--alternatives must be at least 1")
+        try:
+            result = suggest_recipes(catalog, selected_ingredients, args.meals, args.require_meat, workers=args.workers, top_k=args.alternatives)
+        except ValueError as e:
+            parser.error(str(e))
+        if result is None:
+            print("There aren't that many recipes with the required meats.", file=sys.stderr)
+            return 1
+        for rank in range(len(result.ranked)):
+            plan = result.alternative(rank)
+            if args.alternatives > 1:
+                sys.stdout.write(describe_plan(plan, rank))
+            sys.stdout.write(format_suggestions(catalog, plan, selected_ingredients))
+            if args.combined:
+                sys.stdout.write(format_combined_ingredients(combine_ingredients(catalog, suggested_meals(catalog, plan))))
+        return 0
+
+    if args.command == 'batch':
+        from batch import run_batch # for planning many requests
+        try:
+            requests = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+        except OSError as e:
+            parser.error(f"could not read {args.input}: {e}")
+        try:
+            output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+        except OSError as e:
+            if requests is not sys.stdin:
+                requests.close()
+            parser.error(f"could not write {args.output}: {e}")
+        try:
+            run_batch(catalog, requests, output, workers=args.workers)
+        finally:
+            if requests is not sys.stdin:
+                requests.close()
+            if output is not sys.stdout:
+                output.close()
+        return 0
+
+    meals = split_names(args.meals)
+    unknown = [meal for meal in meals if meal.lstrip('* ') not in catalog.recipes_by_meal]
+    if unknown:
+        parser.error(f"unknown meal(s): {', '.join(unknown)}")
+    grocery_list = combine_ingredients(catalog, meals)
+    if args.format == 'json':
+        import json # for the JSON export
+        json.dump(grocery_list.as_dict(), sys.stdout, indent=2)
+        sys.stdout.write('\n')
     else:
-        meal_listbox.insert(tk.END, meal)
-# Pack the listbox and configure scrolling
-meal_listbox.pack(side='left', fill='both', expand=True)
-meal_listbox.config(yscrollcommand=meal_scrollbar.set)
-meal_scrollbar.config(command=meal_listbox.yview)
-
-# Create a frame to hold the ingredients
-ingredients_frame = tk.Frame(root)
-ingredients_frame.pack(side='left', fill='both', expand=True)
-
-# Create and place a label for the ingredients section
-ingredients_title_label = tk.Label(ingredients_frame, text="Select Ingredients", font=("Helvetica", 14, "bold"))
-ingredients_title_label.pack(side='top', padx=10, pady=5)
-
-# Create a frame to hold the canvas and scrollbar together
-scrollable_frame = tk.Frame(ingredients_frame)
-scrollable_frame.pack(side='left', fill='both', expand=True)
-
-# Create a canvas to hold the ingredient categories
-canvas = tk.Canvas(scrollable_frame)
-canvas.pack(side='left', fill='both', expand=True)
-
-# Add a scrollbar linked to the canvas
-overall_ingredient_scrollbar = tk.Scrollbar(scrollable_frame, orient='vertical', command=canvas.yview)
-overall_ingredient_scrollbar.pack(side='right', fill='y')
-
-# Configure canvas to use scrollbar
-canvas.config(yscrollcommand=overall_ingredient_scrollbar.set)
-
-# Create a frame inside the canvas to hold the ingredient category frames
-ingredient_category_container = tk.Frame(canvas)
-canvas.create_window((0, 0), window=ingredient_category_container, anchor='nw')
-
-# Create dictionaries to store frames and listboxes for each ingredient category
-ingredient_category_frames = {}
-category_listboxes = {}
-
-# Iterate over each unique ingredient category to create corresponding UI elements
-for category in unique_ingredients:
-    # Create a new frame for the current category inside the main container
-    category_frame = tk.Frame(ingredient_category_container)
-    category_frame.pack(fill='both', expand=True)
-
-    # Create and place a label for the category
-    category_label = tk.Label(category_frame, text=category, font=("Helvetica", 12, "bold"))
-    category_label.pack(side='top', padx=5, pady=5)
-
-    # Create and place a vertical scrollbar for the category listbox
-    category_scrollbar = tk.Scrollbar(category_frame, orient='vertical')
-    category_scrollbar.pack(side='right', fill='y')
-
-    # Create a listbox to display the ingredients for the current category
-    category_listbox = tk.Listbox(category_frame, yscrollcommand=category_scrollbar.set, selectmode='multiple', exportselection=False, width=30)
-    # Populate the listbox with ingredients and their counts, formatted for display
-    for ingredient in unique_ingredients[category]:
-        display_text = f"{ingredient_counts[ingredient]}\t{ingredient}"
-        category_listbox.insert(tk.END, display_text)
-    category_listbox.pack(side='left', fill='both', expand=True)
-    # Configure scrolling for the listbox
-    category_listbox.config(yscrollcommand=category_scrollbar.set)
-    category_scrollbar.config(command=category_listbox.yview)
-    
-    # Store the frame and listbox in the dictionaries for future reference
-    ingredient_category_frames[category] = category_frame
-    category_listboxes[category] = category_listbox
-
-# Update scroll region when the size of the frame changes
-def update_scrollregion(event):
-    canvas.configure(scrollregion=canvas.bbox("all"))
-
-# Bind the resize event to update scroll region
-ingredient_category_container.bind("<Configure>", update_scrollregion)
-
-# Frame for output and controls
-output_frame = tk.Frame(root)
-output_frame.pack(side='left', fill='both', expand=True)
-
-# Label for the ingredients section
-ingredients_title_label = tk.Label(output_frame, text="Ingredients required", font=("Helvetica", 14, "bold"))
-ingredients_title_label.pack(side='top', padx=10, pady=2)  # Reduced vertical padding
-
-# Text widget for displaying the required ingredients
-ingredients_text = tk.Text(output_frame, wrap="word", font=("Helvetica", 15))
-ingredients_text.pack(fill="both", expand=True)
-
-# Button to calculate the ingredients for the selected meals
-calculate_button = tk.Button(output_frame, text="Calculate Ingredients", command=lambda: calculate_ingredients([meal_listbox.get(i).rstrip(' *') for i in meal_listbox.curselection()]))
-calculate_button.pack(pady=2)  # Reduced vertical padding
-
-# Label and entry for specifying the number of meals to suggest
-num_meals_label = tk.Label(output_frame, text="Number of meals to suggest:", font=("Helvetica", 12))
-num_meals_label.pack(pady=2)  # Reduced vertical padding
-num_meals_entry = tk.Entry(output_frame)
-num_meals_entry.pack(pady=2)  # Reduced vertical padding
-
-# Checkbox to require meat in the suggested recipes
-require_meat_var = tk.BooleanVar()
-require_meat_checkbox = tk.Checkbutton(output_frame, text="Require Meat", variable=require_meat_var)
-require_meat_checkbox.pack(pady=2)  # Reduced vertical padding
-
-# Button to suggest recipes based on selected criteria
-suggest_button = tk.Button(output_frame, text="Suggest Recipes", command=suggest_recipes)
-suggest_button.pack(pady=2)  # Reduced vertical padding
-
-# Button to get the combined ingredient list from the suggested recipes
-get_combined_button = tk.Button(output_frame, text="Get Combined Ingredient List", command=get_combined_ingredients)
-get_combined_button.pack(pady=2)  # Reduced vertical padding
-
-# Initialize an empty list to store suggested recipes
-suggested_recipes = []
-
-# Start the Tkinter event loop, which will keep the application running and responsive to user interactions
-root.mainloop()
\ No newline at end of file
+        sys.stdout.write(format_combined_ingredients(grocery_list))
+    return 0
+
+
+if __name__ == '__main__':
+    # Run the importable module rather than this __main__ copy of it, so the GUI, the batch mode
+    # and the command line share one set of result caches
+    import recipes2groceries
+    sys.exit(recipes2groceries.main())
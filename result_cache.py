@@ -0,0 +1,43 @@
+# Size-bounded LRU cache for planner results. Keys start with the catalog version, so results
+# computed against an older load of the workbook can never be returned for a newer one, and
+# the planner clears its caches whenever a catalog is (re)loaded to free the stale entries.
+import threading # for a lock, as results are computed on the GUI's background job thread
+from collections import OrderedDict # for the least-recently-used ordering
+
+
+class ResultCache:
+    # Maps keys to results, evicting the least recently used entry beyond maxsize entries;
+    # hits and misses count the lookups made with get()
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        # The cached result for key, or None
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        # Counters for reporting, e.g. {'hits': 3, 'misses': 1, 'size': 1, 'maxsize': 64}
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
@@ -0,0 +1,116 @@
+# Recipe x ingredient incidence structure used to score recipe combinations. Every distinct
+# (category, ingredient) item of the catalog is one bit; a recipe is the OR of its items'
+# bits, so the missing-ingredient count of a set of recipes is a few ORs plus a popcount.
+import numpy as np # for vectorised scoring of many candidates at once
+from profiling import profiled # for the opt-in per-stage timings
+
+WORD_BITS = 64
+
+
+def popcount_rows(words):
+    # Count the set bits in each row of a 2D uint64 array
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    # Older NumPy versions have no popcount ufunc, so unpack the bytes of each row instead
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def pack_masks(masks, num_words):
+    # Convert Python-int bitmasks into the rows of a (len(masks), num_words) uint64 matrix
+    num_bytes = num_words * 8
+    data = b''.join(mask.to_bytes(num_bytes, 'little') for mask in masks)
+    return np.frombuffer(data, dtype='<u8').reshape(len(masks), num_words).astype(np.uint64)
+
+
+def score_extensions(candidate_words, needed_words):
+    # Score a whole batch of candidates at once: the number of items each candidate row would
+    # add on top of the items already needed by a partial plan
+    return popcount_rows(candidate_words & ~needed_words)
+
+
+class IncidenceMatrix:
+    # Packed bitmasks of every recipe's items, compiled once from the catalog, plus an inverted
+    # index from each ingredient to the recipes that use it
+    __slots__ = ('num_items', 'num_words', 'recipe_words', 'ingredient_masks', 'meat_mask', 'ingredient_recipes')
+
+    @profiled('incidence')
+    def __init__(self, catalog):
+        self.num_items = len(catalog.item_keys)
+        self.num_words = max(1, -(-self.num_items // WORD_BITS))
+
+        # Bits of all items that share an ingredient name (the same ingredient can appear under several categories)
+        self.ingredient_masks = [0] * len(catalog.ingredient_names)
+        self.meat_mask = 0
+        for item_id, (category_id, ingredient_id) in enumerate(catalog.item_keys):
+            self.ingredient_masks[ingredient_id] |= 1 << item_id
+            if catalog.category_names[category_id].lower() == 'meat':
+                self.meat_mask |= 1 << item_id
+
+        # One row of packed item bits per recipe, in catalog order
+        recipe_masks = []
+        ingredient_recipes = [[] for _ in catalog.ingredient_names]
+        for recipe in catalog.recipes:
+            mask = 0
+            for line in recipe.lines:
+                mask |= 1 << line.item_id
+                if not ingredient_recipes[line.ingredient_id] or ingredient_recipes[line.ingredient_id][-1] != recipe.index:
+                    ingredient_recipes[line.ingredient_id].append(recipe.index)
+            recipe_masks.append(mask)
+        self.recipe_words = pack_masks(recipe_masks, self.num_words)
+        self.ingredient_recipes = [np.array(recipes, dtype=np.intp) for recipes in ingredient_recipes]
+
+
+class PantryState:
+    # Incrementally maintained scoring state for one pantry selection: each recipe's packed
+    # missing items, missing count and number of selected meats it uses. Changing the
+    # selection only touches the recipes of the ingredients that were added or removed, found
+    # through the incidence matrix's inverted index. previous holds the num_meals and ranked
+    # plans of the last search, which warm-start the next one.
+    __slots__ = ('catalog', 'incidence', 'selected', 'missing_words', 'missing_counts', 'meat_counts', 'previous')
+
+    def __init__(self, catalog, incidence):
+        self.catalog = catalog
+        self.incidence = incidence
+        self.selected = set()
+        # Nothing is selected yet, so every recipe item is missing
+        self.missing_words = incidence.recipe_words.copy()
+        self.missing_counts = popcount_rows(self.missing_words)
+        self.meat_counts = np.zeros(len(incidence.recipe_words), dtype=np.int64)
+        self.previous = None
+
+    @profiled('pantry_update')
+    def update(self, selected_ingredients):
+        # Move to a new pantry selection, applying only the added and removed ingredients
+        selected_ingredients = set(selected_ingredients)
+        for ingredient in selected_ingredients - self.selected:
+            self.toggle(ingredient, True)
+        for ingredient in self.selected - selected_ingredients:
+            self.toggle(ingredient, False)
+
+    def toggle(self, ingredient, selected):
+        # Add an ingredient to (or remove it from) the pantry and rescore the recipes using it
+        if selected:
+            self.selected.add(ingredient)
+        else:
+            self.selected.discard(ingredient)
+        ingredient_id = self.catalog.ingredient_ids.get(ingredient)
+        if ingredient_id is None:
+            return
+        incidence = self.incidence
+        rows = incidence.ingredient_recipes[ingredient_id]
+        bits = pack_masks([incidence.ingredient_masks[ingredient_id]], incidence.num_words)[0]
+        if selected:
+            self.missing_words[rows] &= ~bits
+        else:
+            self.missing_words[rows] |= incidence.recipe_words[rows] & bits
+        self.missing_counts[rows] = popcount_rows(self.missing_words[rows])
+
+        meat_mask = incidence.ingredient_masks[ingredient_id] & incidence.meat_mask
+        if meat_mask:
+            meat_bits = pack_masks([meat_mask], incidence.num_words)[0]
+            uses = popcount_rows(incidence.recipe_words[rows] & meat_bits)
+            self.meat_counts[rows] += uses if selected else -uses
+
+    def meat_flags(self):
+        # Whether each recipe uses one of the selected meats
+        return self.meat_counts > 0
@@ -0,0 +1,56 @@
+# Case-insensitive substring search over meal and ingredient names for the GUI's filter
+# boxes. Every name is indexed under each of its 1- to 3-character n-grams, so a query is
+# answered from the postings of its rarest n-gram (and, for longer queries, a substring check
+# of just those names) instead of scanning the whole catalog on every keystroke.
+
+# Longest n-gram indexed
+NGRAM_SIZE = 3
+
+
+def ngrams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SearchIndex:
+    # The names currently indexed, their lowercased forms and n-gram -> {name, ...} postings
+    __slots__ = ('lowered', 'postings')
+
+    def __init__(self, names=()):
+        self.lowered = {}
+        self.postings = {}
+        self.update(names)
+
+    def add(self, name):
+        lowered = self.lowered[name] = name.lower()
+        for size in range(1, NGRAM_SIZE + 1):
+            for gram in ngrams(lowered, size):
+                self.postings.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        lowered = self.lowered.pop(name)
+        for size in range(1, NGRAM_SIZE + 1):
+            for gram in ngrams(lowered, size):
+                names = self.postings[gram]
+                names.discard(name)
+                if not names:
+                    del self.postings[gram]
+
+    def update(self, names):
+        # Index exactly the given names, touching only the ones added or removed since last time
+        names = set(names)
+        for name in self.lowered.keys() - names:
+            self.remove(name)
+        for name in names - self.lowered.keys():
+            self.add(name)
+
+    def search(self, query):
+        # The set of names containing query, ignoring case; every name for an empty query
+        query = query.strip().lower()
+        if not query:
+            return set(self.lowered)
+        size = min(len(query), NGRAM_SIZE)
+        candidates = min((self.postings.get(gram, ()) for gram in ngrams(query, size)), key=len)
+        if len(query) <= NGRAM_SIZE:
+            # The query is itself an indexed n-gram, so its postings are the answer
+            return set(candidates)
+        return {name for name in candidates if query in self.lowered[name]}
@@ -0,0 +1,61 @@
+# Checks the grocery-list aggregation: unit conversion within an ingredient, counts next to
+# weights, amounts kept as written and repeated meals. Run with `python -m pytest`.
+import pytest
+import recipes2groceries as planner
+from catalog import compile_catalog
+
+# Ounces in a gram
+OUNCES_PER_GRAM = 1 / 28.349523125
+
+
+@pytest.fixture
+def catalog():
+    return compile_catalog([
+        (0, 'A', None, '{meat:beef:10oz, produce:onion:1, spice:salt:a pinch, produce:garlic:2 clove}'),
+        (1, 'B', None, '{meat:beef:100 g, produce:onion:150 g, spice:salt:a pinch, produce:garlic:1 clove}'),
+        (2, 'C', None, '{meat:beef:1/2 lb, spice:salt:1 tsp}'),
+    ])
+
+
+def grocery_items(catalog, meals):
+    return {(item.category, item.ingredient, item.unit): item.amount for item in planner.combine_ingredients(catalog, meals).items()}
+
+
+def test_weights_of_one_ingredient_are_converted_and_added(catalog):
+    items = grocery_items(catalog, ['A', 'B', 'C'])
+    # Shown in the unit of the ingredient's first line in catalog order
+    assert items[('meat', 'beef', 'ounce')] == pytest.approx(10 + 100 * OUNCES_PER_GRAM + 8)
+
+
+def test_counts_and_weights_are_listed_separately(catalog):
+    items = grocery_items(catalog, ['A', 'B'])
+    assert items[('produce', 'onion', 'x')] == 1
+    assert items[('produce', 'onion', 'gram')] == pytest.approx(150)
+    # Units pint doesn't know are only added to themselves
+    assert items[('produce', 'garlic', 'clove')] == 3
+
+
+def test_unparsed_amounts_are_counted_as_written(catalog):
+    assert grocery_items(catalog, ['A'])[('spice', 'salt', 'a pinch')] is None
+    items = grocery_items(catalog, ['A', 'B', 'C'])
+    assert items[('spice', 'salt', 'a pinch (x2)')] is None
+    assert items[('spice', 'salt', 'teaspoon')] == 1
+    assert planner.format_combined_ingredients(planner.combine_ingredients(catalog, ['A', 'B'])).count('a pinch (x2) salt\n') == 1
+
+
+def test_a_meal_selected_twice_counts_twice(catalog):
+    once = grocery_items(catalog, ['A', 'B'])
+    twice = grocery_items(catalog, ['A', 'A', 'B'])
+    assert twice[('meat', 'beef', 'ounce')] == pytest.approx(once[('meat', 'beef', 'ounce')] + 10)
+    assert twice[('produce', 'onion', 'x')] == 2
+    assert twice[('spice', 'salt', 'a pinch (x3)')] is None
+    # The order the meals were selected in doesn't matter
+    assert grocery_items(catalog, ['B', 'A', 'A']) == twice
+
+
+def test_sections_are_sorted_by_category_and_ingredient(catalog):
+    grocery_list = planner.combine_ingredients(catalog, ['C', 'B', 'A'])
+    assert [category for category, _ in grocery_list.sections] == ['meat', 'produce', 'spice']
+    for _, items in grocery_list.sections:
+        assert [item.ingredient for item in items] == sorted(item.ingredient for item in items)
+    assert grocery_list.meals == ['C', 'B', 'A']
@@ -0,0 +1,77 @@
+# Checks the parsing of ingredient amounts and the compiled catalog. Run with `python -m pytest`.
+import pytest
+from catalog import compile_catalog, parse_amount
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('10oz', ('10', 10.0, 'oz')),
+    ('2.5 oz', ('2.5', 2.5, 'oz')),
+    ('.5 cup', ('.5', 0.5, 'cup')),
+    ('1', ('1', 1.0, None)),
+    (' 3 ', ('3', 3.0, None)),
+    ('tbsp', ('1', 1.0, 'tbsp')),
+    ('1/2 lb', ('1/2', 0.5, 'lb')),
+    ('1 1/2 cup', ('1 1/2', 1.5, 'cup')),
+    ('3/4', ('3/4', 0.75, None)),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize('text', ['a pinch', '2-3', '1,5', '1.2.3', '1 can (15oz)', '1/0 cup', '-1', '1 1/2/3'])
+def test_parse_amount_rejects_anything_but_numbers(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+
+def test_unparsable_amounts_are_kept_as_written():
+    catalog = compile_catalog([(0, 'A', None, '{dairy:milk:1 1/2 cup, produce:garlic:2-3, dairy:egg:1,5, spice:salt:a pinch}')])
+    lines = {line.ingredient: line for line in catalog.recipes[0].lines}
+    assert lines['milk'].value == 1.5 and lines['milk'].unit == 'cup'
+    for ingredient, text in [('garlic', '2-3'), ('egg', '1,5'), ('salt', 'a pinch')]:
+        assert lines[ingredient].value is None
+        assert lines[ingredient].formatted == f"{text} {ingredient}"
+    # Every unparsable amount is reported, and the ingredients stay in the lists
+    assert len(catalog.format_issues) == 3
+    assert catalog.unique_ingredients == {'dairy': ['egg', 'milk'], 'produce': ['garlic'], 'spice': ['salt']}
+
+
+def catalog_fields(catalog):
+    # Everything a reload must reproduce, with ids resolved through the catalog's own tables
+    recipes = [(recipe.meal, recipe.favourite, recipe.row_index, recipe.index,
+                [(line.category_id, line.ingredient_id, line.item_id, line.category, line.ingredient, line.amount_text,
+                  line.value_text, line.value, line.unit) for line in recipe.lines])
+               for recipe in catalog.recipes]
+    return {'recipes': recipes, 'sorted_meals': catalog.sorted_meals,
+            'category_names': catalog.category_names, 'category_ids': catalog.category_ids,
+            'ingredient_names': catalog.ingredient_names, 'ingredient_ids': catalog.ingredient_ids,
+            'item_keys': catalog.item_keys, 'item_ids': catalog.item_ids,
+            'unique_ingredients': catalog.unique_ingredients, 'ingredient_counts': catalog.ingredient_counts,
+            'unit_table': catalog.unit_table, 'format_issues': catalog.format_issues}
+
+
+def test_reload_matches_a_fresh_compile():
+    import random # for the seeded edits
+    rng = random.Random(0)
+    amounts = ['10oz', '200 g', '1 1/2 cup', '2', '3 clove', 'a pinch', '2-3']
+    categories = ['meat', 'produce', 'dairy', 'pantry']
+
+    def random_row(row_index):
+        parts = [f"{rng.choice(categories)}:ingredient {rng.randrange(40)}:{rng.choice(amounts)}" for _ in range(rng.randint(1, 6))]
+        if rng.random() < 0.1:
+            # A malformed entry, reported as a format issue
+            parts.append('produce:onion')
+        return (row_index, f"Meal {rng.randrange(60)}", rng.choice([1, None]), '{' + ', '.join(parts) + '}')
+
+    rows = [random_row(i) for i in range(40)]
+    catalog = compile_catalog(rows)
+    for _ in range(15):
+        # Delete, edit and append rows, then renumber them as a reload of the file would
+        rows = [row for row in rows if rng.random() > 0.15]
+        rows = [random_row(0) if rng.random() < 0.15 else row for row in rows]
+        rows += [random_row(0) for _ in range(rng.randint(0, 5))]
+        rows = [(row_index, meal, favourite, ingredients) for row_index, (_, meal, favourite, ingredients) in enumerate(rows)]
+
+        reloaded = compile_catalog(rows, previous=catalog)
+        assert catalog_fields(reloaded) == catalog_fields(compile_catalog(rows))
+        catalog = reloaded
@@ -0,0 +1,42 @@
+# Checks that the excel, CSV and SQLite loaders read the same recipe rows, including from paths
+# with characters that are special in URIs. Run with `python -m pytest`.
+import pytest
+from benchmark import write_recipes
+from loaders import iter_recipe_rows
+
+# (row index, meal, favourite, ingredients string) rows written to every format
+ROWS = [
+    (0, 'Beef Tacos', 1, '{meat:ground beef:10oz, produce:onion:1}'),
+    (1, 'Rice Bowl', None, '{carbs:rice:0.5 cup}'),
+    (2, 'No Ingredients', None, None),
+    (3, 'Pancakes', None, '{baking:flour:1/2 cup, dairy:milk:1 cup}'),
+]
+
+
+@pytest.mark.parametrize('extension', ['xlsx', 'csv', 'db'])
+@pytest.mark.parametrize('name', ['recipes', 'r#1', 'r%20x'])
+def test_loaders_read_the_same_rows(tmp_path, extension, name):
+    if extension == 'xlsx':
+        pytest.importorskip('openpyxl')
+    directory = tmp_path / 'a#b%20c'
+    directory.mkdir()
+    path = str(directory / f"{name}.{extension}")
+    write_recipes(path, ROWS)
+
+    rows = list(iter_recipe_rows(path))
+    assert [(index, meal, ingredients) for index, meal, _, ingredients in rows] == \
+        [(index, meal, ingredients) for index, meal, _, ingredients in ROWS if ingredients is not None]
+    assert [favourite == 1 for _, _, favourite, _ in rows] == [True, False, False]
+    # Opening the database read-only must not leave stray files behind
+    assert sorted(p.name for p in directory.iterdir()) == [f"{name}.{extension}"]
+
+
+def test_csv_favourites_that_are_not_numbers(tmp_path):
+    path = tmp_path / 'recipes.csv'
+    path.write_text('Favourite,Meal,Ingredients\nyes,A,{x:a:1}\n*,B,{x:b:1}\n1,C,{x:c:1}\n 1.0 ,D,{x:d:1}\n,E,{x:e:1}\n', encoding='utf-8')
+    assert [favourite == 1 for _, _, favourite, _ in iter_recipe_rows(str(path))] == [False, False, True, True, False]
+
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_recipe_rows(str(tmp_path / 'recipes.md')))
@@ -0,0 +1,82 @@
+# Checks the branch-and-bound suggestion search against a brute-force search over
+# itertools.combinations, for the best count, the top-k ranking, the parallel search and the
+# warm-started search. Run with `python -m pytest`.
+import random # for the seeded random instances
+from itertools import combinations # for the brute-force search
+import numpy as np
+from optimizer import find_best_combination
+from scoring import pack_masks
+
+# Number of random instances checked by each test
+NUM_INSTANCES = 60
+
+
+def random_instance(rng):
+    # A random packed (recipes x words) matrix of missing items, its masks and eligible flags
+    num_recipes = rng.randint(3, 9)
+    num_items = rng.randint(1, 80)
+    masks = [rng.getrandbits(num_items) & rng.getrandbits(num_items) for _ in range(num_recipes)]
+    eligible = np.array([rng.random() < 0.8 for _ in range(num_recipes)])
+    return pack_masks(masks, max(1, -(-num_items // 64))), masks, eligible
+
+
+def brute_force_counts(masks, num_meals, eligible):
+    # Missing-ingredient counts of every eligible combination, lowest first
+    indices = [i for i in range(len(masks)) if eligible[i]]
+    counts = []
+    for combination in combinations(indices, num_meals):
+        mask = 0
+        for i in combination:
+            mask |= masks[i]
+        counts.append(bin(mask).count('1'))
+    return sorted(counts)
+
+
+def plan_count(masks, combination):
+    mask = 0
+    for i in combination:
+        mask |= masks[i]
+    return bin(mask).count('1')
+
+
+def test_best_and_top_k_match_brute_force():
+    rng = random.Random(0)
+    for _ in range(NUM_INSTANCES):
+        words, masks, eligible = random_instance(rng)
+        num_meals = rng.randint(1, len(masks))
+        top_k = rng.randint(1, 5)
+        counts = brute_force_counts(masks, num_meals, eligible)
+        result = find_best_combination(words, num_meals, eligible=eligible, top_k=top_k)
+        if not counts:
+            assert result is None
+            continue
+        assert result.complete
+        assert result.missing_count == counts[0]
+        assert [count for _, count in result.ranked] == counts[:top_k]
+        for combination, count in result.ranked:
+            assert len(set(combination)) == num_meals
+            assert all(eligible[i] for i in combination)
+            assert plan_count(masks, combination) == count
+        assert len({tuple(sorted(combination)) for combination, _ in result.ranked}) == len(result.ranked)
+
+
+def test_parallel_and_warm_start_give_the_same_ranking():
+    rng = random.Random(1)
+    for instance in range(NUM_INSTANCES // 3):
+        words, masks, eligible = random_instance(rng)
+        num_meals = rng.randint(1, len(masks))
+        top_k = rng.randint(1, 4)
+        expected = find_best_combination(words, num_meals, eligible=eligible, top_k=top_k)
+        if expected is None:
+            continue
+        # Warm-start from a shuffled mix of the expected plans and some arbitrary ones
+        indices = [i for i in range(len(masks)) if eligible[i]]
+        warm_start = [combination for combination, _ in expected.ranked] + [rng.sample(indices, num_meals) for _ in range(3)]
+        rng.shuffle(warm_start)
+        warm = find_best_combination(words, num_meals, eligible=eligible, top_k=top_k, warm_start=warm_start)
+        assert warm.ranked == expected.ranked
+        # Starting worker processes is slow, so only some instances are searched in parallel
+        if instance % 4 == 0:
+            parallel = find_best_combination(words, num_meals, eligible=eligible, top_k=top_k, workers=2, warm_start=warm_start)
+            assert parallel.ranked == expected.ranked
+            assert find_best_combination(words, num_meals, eligible=eligible, top_k=top_k, workers=2).ranked == expected.ranked
@@ -0,0 +1,28 @@
+# Checks the profiling switch and report. Run with `python -m pytest`.
+import pytest
+import profiling
+
+
+@pytest.mark.parametrize('value, enabled', [('', False), ('0', False), ('false', False), ('No', False), (' off ', False),
+                                            ('1', True), ('yes', True), ('true', True)])
+def test_environment_switch(value, enabled):
+    assert profiling.env_enabled(value) is enabled
+
+
+def test_stages_are_only_recorded_while_enabled(monkeypatch):
+    @profiling.profiled('work')
+    def work():
+        return 42
+
+    monkeypatch.setattr(profiling, '_enabled', False)
+    profiling.reset()
+    assert work() == 42
+    assert profiling.report() == {}
+    monkeypatch.setattr(profiling, '_enabled', True)
+    work()
+    with profiling.stage('block'):
+        pass
+    report = profiling.report()
+    assert report['work']['calls'] == 1 and report['block']['calls'] == 1
+    profiling.reset()
+
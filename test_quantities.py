@@ -0,0 +1,37 @@
+# Checks the precomputed unit conversions. Run with `python -m pytest`.
+import pytest
+from catalog import compile_catalog
+from quantities import COUNT_UNIT, build_unit_table, format_amount, unit_conversion
+
+
+def test_known_units_convert_to_their_base_unit():
+    canonical, factor, display = unit_conversion('oz')
+    assert (canonical, display) == ('kilogram', 'ounce')
+    assert factor == pytest.approx(0.028349523125)
+    # Units of the same kind share a canonical unit, so they can be added together
+    assert unit_conversion('g')[0] == unit_conversion('lb')[0] == canonical
+    assert unit_conversion('cup')[0] == unit_conversion('tbsp')[0] != canonical
+
+
+def test_counts_and_unknown_units_are_kept_as_they_are():
+    assert unit_conversion(None) == (COUNT_UNIT, 1.0, COUNT_UNIT)
+    assert unit_conversion('clove') == ('clove', 1.0, 'clove')
+
+
+def test_unit_table_covers_the_units_used():
+    catalog = compile_catalog([(0, 'A', None, '{meat:beef:10oz, produce:onion:1, produce:garlic:2 clove, spice:salt:a pinch}')])
+    assert set(catalog.unit_table) == {'oz', None, 'clove'}
+    assert catalog.unit_table['oz'] == unit_conversion('oz')
+
+
+def test_unit_table_reuses_known_conversions():
+    catalog = compile_catalog([(0, 'A', None, '{meat:beef:10oz, produce:garlic:2 clove}')])
+    known = {'oz': ('stand-in', 2.0, 'stand-in'), 'cup': ('unused', 1.0, 'unused')}
+    table = build_unit_table(catalog.recipes, known)
+    # Known units aren't converted again, and units no longer used are dropped
+    assert table == {'oz': known['oz'], 'clove': ('clove', 1.0, 'clove')}
+
+
+@pytest.mark.parametrize('amount, text', [(1.0, '1'), (0.5, '0.5'), (1 / 3, '0.33'), (2.999, '3'), (1500.0, '1500')])
+def test_format_amount(amount, text):
+    assert format_amount(amount) == text
@@ -0,0 +1,53 @@
+# Checks the incrementally maintained pantry scoring state against a from-scratch computation
+# after random sequences of pantry changes. Run with `python -m pytest`.
+import random # for the seeded random catalogs and pantry changes
+from catalog import compile_catalog
+from scoring import IncidenceMatrix, PantryState
+
+# Categories of the random catalogs; "Meat" and "meat" both count as meat
+CATEGORIES = ('Meat', 'meat', 'produce', 'dairy')
+
+# Ingredients of the random catalogs; each can show up under several categories
+INGREDIENTS = [f"ingredient {i}" for i in range(90)] + ['Unknown']
+
+
+def random_catalog(rng):
+    rows = []
+    for row_index in range(rng.randint(1, 40)):
+        parts = [f"{rng.choice(CATEGORIES)}:{ingredient}:1" for ingredient in rng.sample(INGREDIENTS[:-1], rng.randint(1, 8))]
+        rows.append((row_index, f"Meal {row_index}", None, '{' + ', '.join(parts) + '}'))
+    return compile_catalog(rows)
+
+
+def row_items(words):
+    # Item ids of the set bits of one packed row
+    return {word_index * 64 + bit for word_index, word in enumerate(words.tolist()) for bit in range(64) if word >> bit & 1}
+
+
+def expected_state(catalog, pantry):
+    # Missing items and "uses a selected meat" flag of every recipe, computed from its lines
+    missing = [{line.item_id for line in recipe.lines if line.ingredient not in pantry} for recipe in catalog.recipes]
+    meat = [any(line.ingredient in pantry and line.category.lower() == 'meat' for line in recipe.lines) for recipe in catalog.recipes]
+    return missing, meat
+
+
+def test_pantry_changes_match_a_fresh_computation():
+    rng = random.Random(0)
+    for _ in range(30):
+        catalog = random_catalog(rng)
+        state = PantryState(catalog, IncidenceMatrix(catalog))
+        pantry = set()
+        for _ in range(25):
+            if rng.random() < 0.3:
+                # Replace several ingredients at once, as a new selection in the GUI would
+                pantry = set(rng.sample(INGREDIENTS, rng.randint(0, 10)))
+                state.update(pantry)
+            else:
+                ingredient = rng.choice(INGREDIENTS)
+                pantry ^= {ingredient}
+                state.update(pantry)
+            missing, meat = expected_state(catalog, pantry)
+            assert state.selected == pantry
+            assert [row_items(words) for words in state.missing_words] == missing
+            assert state.missing_counts.tolist() == [len(items) for items in missing]
+            assert state.meat_flags().tolist() == meat
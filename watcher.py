@@ -0,0 +1,29 @@
+# Polling file watcher used to hot-reload the recipes file. It only calls os.stat, so it works
+# everywhere without extra services; a change is reported once the file's size and
+# modification time have stayed the same for one poll, so a file still being saved isn't
+# read half-written.
+import os # for stat calls
+
+
+class FileWatcher:
+    # Call changed() periodically; it returns True once per settled change of the file
+    def __init__(self, path):
+        self.path = path
+        self.loaded = self.signature()
+        self.last_seen = self.loaded
+
+    def signature(self):
+        # (size, modification time) of the file, or None while it is missing (e.g. mid-save)
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def changed(self):
+        signature = self.signature()
+        settled = signature is not None and signature == self.last_seen and signature != self.loaded
+        self.last_seen = signature
+        if settled:
+            self.loaded = signature
+        return settled